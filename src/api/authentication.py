@@ -0,0 +1,105 @@
+import time
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AbstractBaseUser
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTTokenUserScheme
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication, get_authorization_header
+from rest_framework.authtoken.models import Token
+from rest_framework.request import Request
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+
+from api.cache import auth_tokens, token_revocations
+
+User = get_user_model()
+
+# Kept in model field order, as `Model.from_db` expects for partial rows.
+CACHED_USER_FIELDS = tuple(
+    field.attname
+    for field in User._meta.concrete_fields
+    if field.attname in ("id", "username", "is_active", "is_staff", "is_superuser")
+)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Token authentication that caches token -> user lookups in process.
+
+    A cache hit builds the user from the cached id and flags without a query,
+    any other user field is loaded lazily on first access. Entries expire
+    after `AUTH_TOKEN_CACHE_TTL` seconds. Token deletion and user changes drop
+    them in the same process and revoke them in the others through
+    `token_revocations`, which each hit checks in the shared cache.
+    """
+
+    def authenticate_credentials(self, key: str) -> tuple[AbstractBaseUser, Token]:
+        return self.get_cached_credentials(key) or self.load_credentials(key)
+
+    async def aauthenticate(self, request: Request) -> tuple | None:
+        """
+        Authenticates like `authenticate` without blocking the event loop.
+
+        Only tokens missing from the cache are loaded, in a worker thread.
+        """
+        auth = get_authorization_header(request).split()
+
+        if len(auth) != 2 or auth[0].lower() != self.keyword.lower().encode():
+            # Skipped or rejected without queries.
+            return self.authenticate(request)
+
+        try:
+            key = auth[1].decode()
+        except UnicodeError:
+            return self.authenticate(request)
+
+        return self.get_cached_credentials(key) or await sync_to_async(
+            self.load_credentials
+        )(key)
+
+    def get_cached_credentials(self, key: str) -> tuple[AbstractBaseUser, Token] | None:
+        """Builds the user and token of a cached key without queries."""
+        entry = auth_tokens.get(key)
+
+        if entry is None:
+            return None
+
+        cached_at, values = entry
+
+        if token_revocations.is_revoked(values[CACHED_USER_FIELDS.index("id")], cached_at):
+            auth_tokens.delete(key)
+            return None
+
+        user = User.from_db(DEFAULT_DB_ALIAS, CACHED_USER_FIELDS, values)
+
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(_("User inactive or deleted."))
+
+        token = Token(key=key, user=user)
+        token._state.adding = False
+        return user, token
+
+    def load_credentials(self, key: str) -> tuple[AbstractBaseUser, Token]:
+        """Loads the user and token of a key and caches them."""
+        # Taken before the query, so a revocation committed meanwhile covers it.
+        cached_at = time.time()
+        user, token = super().authenticate_credentials(key)
+        auth_tokens.set(
+            key, (cached_at, tuple(getattr(user, field) for field in CACHED_USER_FIELDS))
+        )
+        return user, token
+
+
+class StatelessJWTAuthentication(JWTStatelessUserAuthentication):
+    """Stateless JWT authentication, which async views run in the event loop."""
+
+    async def aauthenticate(self, request: Request) -> tuple | None:
+        return self.authenticate(request)
+
+
+class StatelessJWTScheme(SimpleJWTTokenUserScheme):
+    """Describes `StatelessJWTAuthentication` in the OpenAPI schema."""
+
+    target_class = "api.authentication.StatelessJWTAuthentication"
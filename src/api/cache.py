@@ -0,0 +1,168 @@
+"""
+Caches used by the API: catalog payloads, short-lived in-process lookups and
+token revocations.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+from datetime import datetime
+from typing import Any
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, BaseCache, caches
+from django.utils import timezone
+
+VERSION_KEY = "catalog:version"
+DELETED_AT_KEY = "catalog:deleted-at"
+REVOCATION_KEY = "auth:revoked:{}"
+
+
+class CatalogCache:
+    """
+    Stores serialized catalog payloads under the current catalog version.
+
+    Bumping the version makes every stored payload unreachable at once, so no
+    key enumeration is needed. Any configured Django cache can back it, the
+    alias is taken from the `CATALOG_CACHE_ALIAS` setting. It also records the
+    time of the last catalog deletion, which no remaining row carries.
+    """
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def cache(self) -> BaseCache:
+        return caches[settings.CATALOG_CACHE_ALIAS]
+
+    @property
+    def version(self) -> int:
+        """Returns the current catalog version."""
+        return self.cache.get_or_set(VERSION_KEY, 1, timeout=None)
+
+    def bump(self) -> None:
+        """Invalidates every payload stored for the current catalog version."""
+        try:
+            self.cache.incr(VERSION_KEY)
+        except ValueError:
+            self.cache.add(VERSION_KEY, 1, timeout=None)
+
+    @property
+    def deleted_at(self) -> datetime | None:
+        """Returns the time of the last catalog deletion, if one is recorded."""
+        return self.cache.get(DELETED_AT_KEY)
+
+    def record_deletion(self) -> None:
+        self.cache.set(DELETED_AT_KEY, timezone.now(), timeout=None)
+
+    def _key(self, key: str) -> str:
+        return f"catalog:{self.version}:{key}"
+
+    def get(self, key: str) -> Any | None:
+        """Returns the stored payload, counting the lookup as a hit or a miss."""
+        value = self.cache.get(self._key(key))
+
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        self.cache.set(self._key(key), value, timeout=settings.CATALOG_CACHE_TIMEOUT)
+
+
+catalog_cache = CatalogCache()
+
+
+class TTLCache:
+    """
+    Thread-safe in-process mapping with expiring entries.
+
+    Entries live for `ttl` seconds, the least recently set ones are evicted
+    once there are more than `maxsize` of them.
+    """
+
+    def __init__(self, ttl: float, maxsize: int) -> None:
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def hit_rate(self) -> float:
+        """Returns the share of lookups answered from the cache."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def get(self, key: Hashable) -> Any | None:
+        with self._lock:
+            expires, value = self._entries.get(key, (0, None))
+
+            if expires < time.monotonic():
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+cart_ids = TTLCache(
+    ttl=settings.CART_ID_CACHE_TTL,
+    maxsize=settings.CART_ID_CACHE_SIZE,
+)
+
+auth_tokens = TTLCache(
+    ttl=settings.AUTH_TOKEN_CACHE_TTL,
+    maxsize=settings.AUTH_TOKEN_CACHE_SIZE,
+)
+
+
+class TokenRevocations:
+    """
+    Records when the tokens of a user were revoked, in the shared default cache.
+
+    Processes check the record on every token cache hit, so logging out or
+    deactivating a user takes effect in all of them at once. A record only has
+    to outlive the tokens cached before it, so it expires with them.
+    """
+
+    @property
+    def cache(self) -> BaseCache:
+        return caches[DEFAULT_CACHE_ALIAS]
+
+    def revoke(self, user_id: int) -> None:
+        """Revokes the tokens of the user cached until now."""
+        self.cache.set(
+            REVOCATION_KEY.format(user_id), time.time(), timeout=settings.AUTH_TOKEN_CACHE_TTL
+        )
+
+    def is_revoked(self, user_id: int, cached_at: float) -> bool:
+        """Returns whether the tokens of the user were revoked since they were cached."""
+        revoked_at = self.cache.get(REVOCATION_KEY.format(user_id))
+        return revoked_at is not None and revoked_at >= cached_at
+
+
+token_revocations = TokenRevocations()
@@ -1 +1,16 @@
 MIN_QUANTITY = 1
+
+SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 50
+
+MAX_BATCH_OPERATIONS = 100
+
+# Range of BigAutoField primary keys.
+MAX_ID = 2**63 - 1
+
+
+class CartOperation:
+    ADD = "add"
+    SET = "set"
+    REMOVE = "remove"
+    CHOICES = (ADD, SET, REMOVE)
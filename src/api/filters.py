@@ -0,0 +1,77 @@
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import QuerySet
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend, OrderingFilter
+from rest_framework.request import Request
+from rest_framework.views import APIView
+
+
+class StableOrderingFilter(OrderingFilter):
+    """Ordering filter that appends the primary key to keep pages deterministic."""
+
+    def get_ordering(self, request: Request, queryset: QuerySet, view: APIView) -> list:
+        ordering = list(super().get_ordering(request, queryset, view) or ())
+
+        if not any(field.lstrip("-") in ("id", "pk") for field in ordering):
+            ordering.append("id")
+
+        return ordering
+
+
+class ProductFilterBackend(BaseFilterBackend):
+    """Filters products by category slug, subcategory slug and price range."""
+
+    lookups = {
+        "category": "subcategory__category__slug",
+        "subcategory": "subcategory__slug",
+    }
+    price_lookups = {
+        "min_price": "price__gte",
+        "max_price": "price__lte",
+    }
+    descriptions = {
+        "category": "Slug of the product category.",
+        "subcategory": "Slug of the product subcategory.",
+        "min_price": "Minimum product price.",
+        "max_price": "Maximum product price.",
+    }
+
+    def filter_queryset(
+        self,
+        request: Request,
+        queryset: QuerySet,
+        view: APIView,
+    ) -> QuerySet:
+        filters = {}
+
+        for param, lookup in self.lookups.items():
+            if value := request.query_params.get(param):
+                filters[lookup] = value
+
+        for param, lookup in self.price_lookups.items():
+            if value := request.query_params.get(param):
+                try:
+                    price = Decimal(value)
+                except InvalidOperation:
+                    price = None
+
+                # NaN and infinities parse, but cannot be compared with prices.
+                if price is None or not price.is_finite():
+                    raise ValidationError({param: "A valid number is required."})
+
+                filters[lookup] = price
+
+        return queryset.filter(**filters)
+
+    def get_schema_operation_parameters(self, view: APIView) -> list[dict]:
+        return [
+            {
+                "name": param,
+                "required": False,
+                "in": "query",
+                "description": self.descriptions[param],
+                "schema": {"type": "number" if param in self.price_lookups else "string"},
+            }
+            for param in (*self.lookups, *self.price_lookups)
+        ]
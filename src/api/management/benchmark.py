@@ -0,0 +1,156 @@
+"""Helpers shared by the benchmark management commands."""
+
+import io
+import statistics
+import subprocess
+from collections.abc import Iterator
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.db import connection
+from django.test.utils import setup_test_environment
+from PIL import Image
+from rest_framework.authtoken.models import Token
+
+from cart.models import Cart, CartItem
+from categories.models import Category, SubCategory
+from products import images
+from products.constants import ImageStatus
+from products.models import Product
+
+
+def get_commit() -> str | None:
+    """Returns the checked out git commit, if the code runs from a git checkout."""
+    try:
+        return subprocess.run(
+            ("git", "rev-parse", "HEAD"), capture_output=True, check=True, text=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def summarize(latencies: list[float], queries: list[int] | None = None) -> dict:
+    """Returns throughput, latency percentiles in ms and query counts of a case."""
+    percentiles = statistics.quantiles(latencies, n=100, method="inclusive")
+    summary = {
+        "requests": len(latencies),
+        "throughput": round(len(latencies) / sum(latencies), 2),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+        "p50_ms": round(percentiles[49] * 1000, 3),
+        "p95_ms": round(percentiles[94] * 1000, 3),
+        "p99_ms": round(percentiles[98] * 1000, 3),
+    }
+
+    if queries:
+        summary["queries"] = max(queries)
+
+    return summary
+
+
+@contextmanager
+def throwaway_database() -> Iterator[None]:
+    """Runs the block against a freshly migrated test database, destroyed afterwards."""
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def generate_image(index: int) -> ContentFile:
+    """Returns a tiny JPEG whose color depends on the index, so contents differ."""
+    buffer = io.BytesIO()
+    color = (index * 37 % 256, index * 59 % 256, index * 83 % 256)
+    Image.new("RGB", (16, 16), color).save(buffer, format="JPEG")
+    return ContentFile(buffer.getvalue())
+
+
+def generate_product_images(count: int) -> list[dict[str, str]]:
+    """Stores `count` tiny product images with derivatives, returning field values."""
+    field = Product._meta.get_field("image")
+    values = []
+
+    for index in range(count):
+        name = field.storage.save(
+            field.generate_filename(None, f"bench-{index}.jpg"), generate_image(index)
+        )
+        paths = images.render_derivatives(field.storage.path(name), name)
+        values.append(
+            {"image": name, "image_status": ImageStatus.READY}
+            | {f"image_{size_name}": path for size_name, path in paths.items()}
+        )
+
+    return values
+
+
+def generate_catalog(
+    categories: int, subcategories: int, products: int, image_count: int = 10
+) -> list[int]:
+    """
+    Creates categories with subcategories and products per subcategory.
+
+    Products share `image_count` generated images. Returns the product ids.
+    """
+    image_values = generate_product_images(image_count)
+    category_image = Category._meta.get_field("image").storage.save(
+        "categories/bench.jpg", generate_image(0)
+    )
+    created = Category.objects.bulk_create(
+        Category(name=f"Category {index}", slug=f"category-{index}", image=category_image)
+        for index in range(categories)
+    )
+    created_subcategories = SubCategory.objects.bulk_create(
+        SubCategory(
+            name=f"Subcategory {category.pk}-{index}",
+            slug=f"subcategory-{category.pk}-{index}",
+            category=category,
+            image=category_image,
+        )
+        for category in created
+        for index in range(subcategories)
+    )
+    Product.objects.bulk_create(
+        (
+            Product(
+                name=f"Product {subcategory.pk}-{index}",
+                slug=f"product-{subcategory.pk}-{index}",
+                price=Decimal(index % 1000) + Decimal("0.99"),
+                subcategory=subcategory,
+                **image_values[index % len(image_values)],
+            )
+            for subcategory in created_subcategories
+            for index in range(products)
+        ),
+        batch_size=10_000,
+    )
+    return list(Product.objects.order_by("id").values_list("id", flat=True))
+
+
+def generate_carts(count: int, depth: int, product_ids: list[int]) -> list[str]:
+    """Creates users with carts of `depth` items each, returning their tokens."""
+    User = get_user_model()
+    users = User.objects.bulk_create(
+        User(username=f"bench-{index}", password="!") for index in range(count)
+    )
+    carts = Cart.objects.bulk_create(Cart(user=user) for user in users)
+    CartItem.objects.bulk_create(
+        (
+            CartItem(
+                cart=cart,
+                product_id=product_ids[(index + offset) % len(product_ids)],
+                quantity=offset % 5 + 1,
+            )
+            for index, cart in enumerate(carts)
+            for offset in range(depth)
+        ),
+        batch_size=10_000,
+    )
+    Cart.objects.recalculate_totals()
+    tokens = Token.objects.bulk_create(
+        Token(key=Token.generate_key(), user=user) for user in users
+    )
+    return [token.key for token in tokens]
@@ -0,0 +1,202 @@
+import json
+import platform
+import tempfile
+import time
+from collections.abc import Callable
+from datetime import datetime, timezone
+from itertools import cycle
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api.management.benchmark import (
+    generate_carts,
+    generate_catalog,
+    get_commit,
+    summarize,
+    throwaway_database,
+)
+from api.metrics import RequestTimings
+from cart.models import CartItem
+from products.models import Product
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures throughput, latency percentiles and query counts of the catalog "
+        "and cart endpoints on a throwaway test database filled with a synthetic "
+        "catalog and carts. Runs against the database configured by DB_ENGINE."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--categories", type=int, default=10)
+        parser.add_argument("--subcategories", type=int, default=10)
+        parser.add_argument("--products", type=int, default=100)
+        parser.add_argument("--carts", type=int, default=100)
+        parser.add_argument("--cart-depth", type=int, default=20)
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--warmup", type=int, default=10)
+        parser.add_argument("--output", help="Path of the JSON results file.")
+        parser.add_argument("--baseline", help="JSON results to compare with.")
+
+    def handle(self, *args, **options):
+        with (
+            tempfile.TemporaryDirectory() as media_root,
+            override_settings(MEDIA_ROOT=media_root),
+            throwaway_database(),
+        ):
+            started = time.perf_counter()
+            product_ids = generate_catalog(
+                options["categories"], options["subcategories"], options["products"]
+            )
+            tokens = generate_carts(options["carts"], options["cart_depth"], product_ids)
+            self.stdout.write(
+                f"Generated {len(product_ids)} products and {len(tokens)} carts "
+                f"in {time.perf_counter() - started:.1f} s."
+            )
+            results = {
+                name: self.measure(request, options["requests"], options["warmup"])
+                for name, request in self.get_cases(product_ids, tokens).items()
+            }
+
+        report = {
+            "meta": {
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "commit": get_commit(),
+                "database": connection.vendor,
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "options": {
+                    name: options[name]
+                    for name in (
+                        "categories",
+                        "subcategories",
+                        "products",
+                        "carts",
+                        "cart_depth",
+                        "requests",
+                        "warmup",
+                    )
+                },
+            },
+            "results": results,
+        }
+        baseline = None
+
+        if options["baseline"]:
+            with open(options["baseline"]) as file:
+                baseline = json.load(file)["results"]
+
+        self.write_table(results, baseline)
+
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                json.dump(report, file, indent=2)
+                file.write("\n")
+
+            self.stdout.write(f"Saved results to {options['output']}.")
+
+    def get_cases(self, product_ids: list[int], tokens: list[str]) -> dict[str, Callable]:
+        """Returns functions making one request of each benchmarked case."""
+        anonymous = APIClient()
+        clients = []
+
+        for token in tokens:
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f"Token {token}")
+            clients.append(client)
+
+        products_url = reverse("product-list")
+        product = Product.objects.get(pk=product_ids[len(product_ids) // 2])
+        product_url = reverse("product-detail", args=(product.slug,))
+        categories_url = reverse("category-list")
+        cart_url = reverse("cart")
+        batch_url = reverse("cart-batch")
+        items = {
+            token: (pk, product_id)
+            for token, pk, product_id in CartItem.objects.values_list(
+                "cart__user__auth_token__key", "pk", "product_id"
+            )
+        }
+        cart_clients, item_clients = cycle(clients), cycle(zip(clients, tokens))
+        products = cycle(product_ids)
+        quantities = cycle(range(1, 6))
+
+        def put_item():
+            client, token = next(item_clients)
+            pk, product_id = items[token]
+            url = reverse("cart-item", args=(pk,))
+            return client.put(url, {"product": product_id, "quantity": next(quantities)})
+
+        return {
+            "product-list": lambda: anonymous.get(products_url),
+            "product-list-cursor-100": lambda: anonymous.get(
+                products_url, {"pagination": "cursor", "page_size": 100}
+            ),
+            "product-detail": lambda: anonymous.get(product_url),
+            "category-list": lambda: anonymous.get(categories_url),
+            "cart": lambda: next(cart_clients).get(cart_url),
+            "cart-add": lambda: next(cart_clients).post(
+                cart_url, {"product": next(products), "quantity": 1}
+            ),
+            "cart-item": put_item,
+            "cart-batch": lambda: next(cart_clients).post(
+                batch_url,
+                {
+                    "operations": [
+                        {"product": next(products), "quantity": 1} for _ in range(10)
+                    ]
+                },
+                format="json",
+            ),
+        }
+
+    def measure(self, request: Callable, count: int, warmup: int) -> dict:
+        """Makes the requests, timing them until the whole body is read."""
+        latencies, queries = [], []
+
+        for index in range(warmup + count):
+            timings = RequestTimings()
+
+            with connection.execute_wrapper(timings):
+                started = time.perf_counter()
+                response = request()
+
+                if response.streaming:
+                    b"".join(response.streaming_content)
+
+                latency = time.perf_counter() - started
+
+            assert response.status_code < 300, response.content
+
+            if index >= warmup:
+                latencies.append(latency)
+                queries.append(timings.queries)
+
+        return summarize(latencies, queries)
+
+    def write_table(self, results: dict, baseline: dict | None) -> None:
+        self.stdout.write(
+            f"{'case':>24} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} "
+            f"{'p99 ms':>8} {'queries':>7}"
+        )
+
+        for name, result in results.items():
+            line = (
+                f"{name:>24} {result['throughput']:9.1f} {result['p50_ms']:8.2f} "
+                f"{result['p95_ms']:8.2f} {result['p99_ms']:8.2f} {result['queries']:7}"
+            )
+
+            if baseline and name in baseline:
+                previous = baseline[name]
+                change = result["p50_ms"] / previous["p50_ms"] - 1
+                line += f"  p50 {change:+.0%}"
+
+                if result["queries"] != previous["queries"]:
+                    line += f", queries {previous['queries']} -> {result['queries']}"
+
+            self.stdout.write(line)
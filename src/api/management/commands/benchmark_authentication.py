@@ -0,0 +1,52 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from api.authentication import CachedTokenAuthentication
+from api.cache import auth_tokens
+from api.management.benchmark import throwaway_database
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares the stock and the caching token authentication on a throwaway "
+        "test database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=10_000)
+
+    def handle(self, *args, **options):
+        with throwaway_database():
+            user = User.objects.create_user(username="bench", password="bench")
+            key = Token.objects.create(user=user).key
+            auth_tokens.clear()
+
+            for authentication in (TokenAuthentication(), CachedTokenAuthentication()):
+                queries = []
+
+                def count(execute, sql, params, many, context):
+                    queries.append(sql)
+                    return execute(sql, params, many, context)
+
+                with connection.execute_wrapper(count):
+                    started = time.perf_counter()
+
+                    for _ in range(options["requests"]):
+                        authentication.authenticate_credentials(key)
+
+                    elapsed = time.perf_counter() - started
+
+                self.stdout.write(
+                    f"{type(authentication).__name__:>26}: "
+                    f"{elapsed * 1_000_000 / options['requests']:7.1f} us/request, "
+                    f"{len(queries) / options['requests']:.4f} queries/request"
+                )
+
+            self.stdout.write(f"Token cache hit rate: {auth_tokens.hit_rate:.2%}")
@@ -0,0 +1,192 @@
+import json
+import tempfile
+import threading
+import time
+from collections import Counter
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from itertools import cycle
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, close_old_connections, connection, connections
+from django.db.backends.signals import connection_created
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api.cache import auth_tokens, cart_ids
+from api.management.benchmark import (
+    generate_carts,
+    generate_catalog,
+    get_commit,
+    summarize,
+    throwaway_database,
+)
+
+# SQLite's own defaults, undoing the persistent WAL mode of the tuned runs.
+SQLITE_DEFAULT_PRAGMAS = {"journal_mode": "DELETE", "synchronous": "FULL", "mmap_size": 0}
+
+
+@contextmanager
+def database_mode(
+    conn_max_age: int, sqlite_pragmas: dict | None = None, **options
+) -> Iterator[None]:
+    """Runs the block with other connection settings, applied to new connections."""
+    settings_dict = connections.settings[connection.alias]
+    saved = settings_dict["CONN_MAX_AGE"], settings_dict["OPTIONS"]
+    settings_dict["CONN_MAX_AGE"] = conn_max_age
+    settings_dict["OPTIONS"] = saved[1] | options
+    connection.close()
+
+    try:
+        with override_settings(SQLITE_PRAGMAS=sqlite_pragmas or settings.SQLITE_PRAGMAS):
+            # SQLite only switches the journal mode while no other connection is open.
+            connection.ensure_connection()
+            yield
+    finally:
+        if hasattr(connection, "close_pool"):
+            connection.close_pool()
+
+        connection.close()
+        settings_dict["CONN_MAX_AGE"], settings_dict["OPTIONS"] = saved
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs cart writes and catalog reads from many threads at once on a "
+        "throwaway test database, once with connections closed after every "
+        "request and SQLite defaults, and once with the configured persistent "
+        "connections, pool and SQLite pragmas, and compares them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=16)
+        parser.add_argument("--requests", type=int, default=50, help="Per thread.")
+        parser.add_argument("--products", type=int, default=100)
+        parser.add_argument("--cart-depth", type=int, default=10)
+        parser.add_argument("--output", help="Path of the JSON results file.")
+
+    def handle(self, *args, **options):
+        with (
+            tempfile.TemporaryDirectory() as media_root,
+            override_settings(MEDIA_ROOT=media_root),
+            throwaway_database(),
+        ):
+            product_ids = generate_catalog(2, 5, options["products"], image_count=2)
+            tokens = generate_carts(options["threads"], options["cart_depth"], product_ids)
+            # Pooling is turned off by the option, SQLite takes no such option.
+            per_request = {"pool": False} if connection.vendor == "postgresql" else {}
+            modes = {
+                "per-request": database_mode(0, SQLITE_DEFAULT_PRAGMAS, **per_request),
+                "tuned": database_mode(connection.settings_dict["CONN_MAX_AGE"]),
+            }
+            results = {}
+
+            for name, mode in modes.items():
+                with mode:
+                    results[name] = self.measure(tokens, product_ids, options["requests"])
+
+        self.stdout.write(
+            f"{'mode':>12} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} "
+            f"{'p99 ms':>8} {'conns':>6} {'errors':>6}"
+        )
+
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:>12} {result['throughput']:9.1f} {result['p50_ms']:8.2f} "
+                f"{result['p95_ms']:8.2f} {result['p99_ms']:8.2f} "
+                f"{result['connections']:6} {sum(result['errors'].values()):6}"
+            )
+
+            for error, count in result["errors"].items():
+                self.stdout.write(f"{'':>12} {count} x {error}")
+
+        if options["output"]:
+            report = {
+                "meta": {
+                    "created_at": datetime.now(timezone.utc).isoformat(),
+                    "commit": get_commit(),
+                    "database": connection.vendor,
+                    "options": {
+                        name: options[name]
+                        for name in ("threads", "requests", "products", "cart_depth")
+                    },
+                },
+                "results": results,
+            }
+
+            with open(options["output"], "w") as file:
+                json.dump(report, file, indent=2)
+                file.write("\n")
+
+            self.stdout.write(f"Saved results to {options['output']}.")
+
+    def measure(self, tokens: list[str], product_ids: list[int], count: int) -> dict:
+        """Makes the requests from one thread per cart, alternating writes and reads."""
+        cart_ids.clear()
+        auth_tokens.clear()
+        latencies, errors = [], Counter()
+        opened = []
+        lock = threading.Lock()
+
+        def count_connection(**kwargs) -> None:
+            opened.append(1)
+
+        def run(token: str) -> None:
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f"Token {token}")
+            products = cycle(product_ids[hash(token) % len(product_ids) :] + product_ids)
+            requests = cycle(
+                (
+                    lambda: client.post(
+                        reverse("cart"), {"product": next(products), "quantity": 1}
+                    ),
+                    lambda: client.get(reverse("cart")),
+                    lambda: client.get(reverse("product-list")),
+                )
+            )
+
+            try:
+                for _ in range(count):
+                    started = time.perf_counter()
+
+                    # The test client leaves connections open, servers close
+                    # them around each request unless CONN_MAX_AGE keeps them.
+                    try:
+                        close_old_connections()
+                        response = next(requests)()
+                    except DatabaseError as exc:
+                        error = str(exc)
+                    else:
+                        error = response.status_code >= 400 and str(response.status_code)
+                    finally:
+                        close_old_connections()
+
+                    latency = time.perf_counter() - started
+
+                    with lock:
+                        if error:
+                            errors[error] += 1
+                        else:
+                            latencies.append(latency)
+            finally:
+                connection.close()
+
+        connection_created.connect(count_connection)
+        started = time.perf_counter()
+
+        try:
+            with ThreadPoolExecutor(len(tokens)) as pool:
+                list(pool.map(run, tokens))
+        finally:
+            connection_created.disconnect(count_connection)
+
+        duration = time.perf_counter() - started
+        return summarize(latencies) | {
+            "throughput": round(len(latencies) / duration, 2),
+            "connections": len(opened),
+            "errors": dict(errors),
+        }
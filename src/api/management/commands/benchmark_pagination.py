@@ -0,0 +1,93 @@
+import statistics
+import time
+from base64 import b64encode
+from decimal import Decimal
+from urllib.parse import urlencode
+
+from django.core.management.base import BaseCommand
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api.management.benchmark import throwaway_database
+from categories.models import Category, SubCategory
+from products.models import Product
+
+
+def encode_cursor(position: int) -> str:
+    """Builds a cursor pointing right after the given product id."""
+    query = urlencode({"i": position})
+    return b64encode(query.encode("ascii")).decode("ascii")
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares page-number and keyset pagination of the product list on a "
+        "throwaway test database filled with synthetic products."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1_000_000)
+        parser.add_argument("--page", type=int, default=10_000)
+        parser.add_argument("--page-size", type=int, default=10)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        with throwaway_database():
+            self.populate(options["rows"])
+            self.run(options)
+
+    def populate(self, rows: int) -> None:
+        category = Category.objects.create(name="Bench", slug="bench", image="bench.jpg")
+        subcategory = SubCategory.objects.create(
+            name="Bench", slug="bench", category=category, image="bench.jpg"
+        )
+        batch_size = 10_000
+
+        for start in range(0, rows, batch_size):
+            Product.objects.bulk_create(
+                Product(
+                    name=f"Product {index}",
+                    slug=f"product-{index}",
+                    price=Decimal(index % 1000),
+                    subcategory=subcategory,
+                    image="products/original/bench.jpg",
+                )
+                for index in range(start, min(start + batch_size, rows))
+            )
+
+        self.stdout.write(f"Generated {rows} products.")
+
+    def measure(self, client: APIClient, url: str, params: dict, repeat: int) -> float:
+        """Returns the median latency of a request in ms."""
+        timings = []
+
+        for _ in range(repeat):
+            started = time.perf_counter()
+            response = client.get(url, params)
+            timings.append((time.perf_counter() - started) * 1000)
+            assert response.status_code == 200, response.content
+
+        return statistics.median(timings)
+
+    def run(self, options: dict) -> None:
+        client = APIClient()
+        url = reverse("product-list")
+        page_size = options["page_size"]
+        deep_offset = (options["page"] - 1) * page_size
+        deep_position = Product.objects.order_by("id").values_list("id", flat=True)[
+            deep_offset
+        ]
+
+        cases = {
+            "page-number, page 1": {"page": 1},
+            f"page-number, page {options['page']}": {"page": options["page"]},
+            "keyset, page 1": {"pagination": "cursor", "page_size": page_size},
+            f"keyset, page {options['page']}": {
+                "cursor": encode_cursor(deep_position),
+                "page_size": page_size,
+            },
+        }
+
+        for name, params in cases.items():
+            latency = self.measure(client, url, params, options["repeat"])
+            self.stdout.write(f"{name:>28}: {latency:8.2f} ms")
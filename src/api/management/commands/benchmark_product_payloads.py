@@ -0,0 +1,89 @@
+import statistics
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from rest_framework import mixins
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.test import APIRequestFactory
+
+from api.management.benchmark import throwaway_database
+from api.views.product import ProductViewSet
+from categories.models import Category, SubCategory
+from products.models import Product
+
+
+class SerializedProductViewSet(ProductViewSet):
+    """Product list serialized per request, as before payloads were stored."""
+
+    queryset = Product.objects.order_by("id").select_related("subcategory__category")
+
+    def list(self, request, *args, **kwargs):
+        return mixins.ListModelMixin.list(self, request, *args, **kwargs)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares serialized and stored product payloads of the product list on "
+        "a throwaway test database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=10_000)
+        parser.add_argument("--page-sizes", type=int, nargs="+", default=(10, 100, 1000))
+        parser.add_argument("--repeat", type=int, default=50)
+
+    def handle(self, *args, **options):
+        with throwaway_database():
+            self.populate(options["rows"])
+            self.run(options)
+
+    def populate(self, rows: int) -> None:
+        category = Category.objects.create(name="Bench", slug="bench", image="bench.jpg")
+        subcategory = SubCategory.objects.create(
+            name="Bench", slug="bench", category=category, image="bench.jpg"
+        )
+        Product.objects.bulk_create(
+            (
+                Product(
+                    name=f"Product {index}",
+                    slug=f"product-{index}",
+                    price=Decimal(index % 1000),
+                    subcategory=subcategory,
+                    image="products/original/bench.jpg",
+                )
+                for index in range(rows)
+            ),
+            batch_size=10_000,
+        )
+        self.stdout.write(f"Generated {rows} products.")
+
+    def measure(self, view, repeat: int) -> float:
+        """Returns the median throughput of the first list page in requests/sec."""
+        factory = APIRequestFactory()
+        view(factory.get("/api/products/"))
+        timings = []
+
+        for _ in range(repeat):
+            started = time.perf_counter()
+            response = view(factory.get("/api/products/")).render()
+            timings.append(time.perf_counter() - started)
+            assert response.status_code == 200, response.content
+
+        return 1 / statistics.median(timings)
+
+    def run(self, options: dict) -> None:
+        for page_size in options["page_sizes"]:
+            pagination = type(
+                "BenchmarkPagination", (PageNumberPagination,), {"page_size": page_size}
+            )
+
+            for name, viewset in (
+                ("serialized", SerializedProductViewSet),
+                ("stored", ProductViewSet),
+            ):
+                view = viewset.as_view({"get": "list"}, pagination_class=pagination)
+                throughput = self.measure(view, options["repeat"])
+                self.stdout.write(
+                    f"{name:>10}, page size {page_size:>4}: {throughput:8.1f} req/s"
+                )
@@ -0,0 +1,107 @@
+import statistics
+import time
+from contextlib import nullcontext
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from rest_framework import serializers
+from rest_framework.test import APIRequestFactory
+
+from api.management.benchmark import throwaway_database
+from api.serializers.base import ReadOnlyModelSerializer
+from api.serializers.cart import CartReadSerializer, prefetch_cart_items
+from api.serializers.category import CategoryReadSerializer
+from api.serializers.product import ProductReadSerializer
+from cart.models import Cart, CartItem
+from categories.models import Category, SubCategory
+from products.models import Product
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares the compiled read serializers with DRF's field machinery on "
+        "preloaded rows of a throwaway test database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1000)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        with throwaway_database():
+            self.run(options, self.populate(options["rows"]))
+
+    def populate(self, rows: int) -> dict:
+        """Creates the rows and returns serializer cases with preloaded instances."""
+        categories = Category.objects.bulk_create(
+            Category(name=f"Category {index}", slug=f"category-{index}", image="c.jpg")
+            for index in range(rows // 100 or 1)
+        )
+        subcategories = SubCategory.objects.bulk_create(
+            SubCategory(
+                name=f"Subcategory {index}",
+                slug=f"subcategory-{index}",
+                category=categories[index % len(categories)],
+                image="s.jpg",
+            )
+            for index in range(rows // 10 or 1)
+        )
+        products = Product.objects.bulk_create(
+            Product(
+                name=f"Product {index}",
+                slug=f"product-{index}",
+                price=Decimal(index % 1000),
+                subcategory=subcategories[index % len(subcategories)],
+                image="products/original/bench.jpg",
+            )
+            for index in range(rows)
+        )
+        cart = Cart.objects.get(user=User.objects.create_user(username="bench"))
+        CartItem.objects.bulk_create(
+            CartItem(cart=cart, product=product, quantity=1) for product in products
+        )
+
+        return {
+            "products": (
+                ProductReadSerializer,
+                list(Product.objects.select_related("subcategory__category")),
+            ),
+            "categories": (
+                CategoryReadSerializer,
+                list(Category.objects.prefetch_related("subcategories")),
+            ),
+            "cart": (CartReadSerializer, [prefetch_cart_items(cart)]),
+        }
+
+    def measure(self, serializer_class, instances: list, repeat: int, compiled: bool):
+        """Returns the median time of serializing all instances in ms."""
+        context = {"request": APIRequestFactory().get("/")}
+        patch = nullcontext() if compiled else mock.patch.object(
+            ReadOnlyModelSerializer,
+            "to_representation",
+            serializers.ModelSerializer.to_representation,
+        )
+        timings = []
+
+        with patch:
+            for _ in range(repeat):
+                started = time.perf_counter()
+                serializer_class(instances, many=True, context=context).data
+                timings.append((time.perf_counter() - started) * 1000)
+
+        return statistics.median(timings)
+
+    def run(self, options: dict, cases: dict) -> None:
+        for name, (serializer_class, instances) in cases.items():
+            drf, compiled = (
+                self.measure(serializer_class, instances, options["repeat"], compiled)
+                for compiled in (False, True)
+            )
+            self.stdout.write(
+                f"{name:>10}: DRF {drf:8.2f} ms, compiled {compiled:8.2f} ms "
+                f"({drf / compiled:.1f}x)"
+            )
@@ -0,0 +1,225 @@
+import asyncio
+import json
+import platform
+import re
+import time
+from datetime import datetime, timezone
+from itertools import cycle
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.management.benchmark import get_commit, summarize
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Query count reported by the instrumentation middleware.
+SERVER_TIMING_QUERIES = re.compile(r'desc="(\d+) queries"')
+
+
+def raise_open_files_limit(needed: int) -> int:
+    """Raises the soft limit of open files up to the hard limit, returning it."""
+    if resource is None:
+        return needed
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+
+    if soft < needed:
+        soft = needed if hard == resource.RLIM_INFINITY else min(needed, hard)
+        resource.setrlimit(resource.RLIMIT_NOFILE, (soft, hard))
+
+    return soft
+
+
+async def read_response(reader: asyncio.StreamReader) -> tuple[int, dict[str, str]]:
+    """Reads an HTTP/1.1 response, discarding the body, and returns its status and headers."""
+    status_line = await reader.readline()
+
+    if not status_line:
+        raise ConnectionResetError("Connection closed by the server.")
+
+    status = int(status_line.split()[1])
+    headers = {}
+
+    while (line := await reader.readline()) not in (b"\r\n", b""):
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    if headers.get("transfer-encoding") == "chunked":
+        while size := int((await reader.readline()).split(b";")[0], 16):
+            await reader.readexactly(size + 2)
+
+        while (await reader.readline()) not in (b"\r\n", b""):
+            pass
+    else:
+        await reader.readexactly(int(headers.get("content-length", 0)))
+
+    return status, headers
+
+
+class Command(BaseCommand):
+    help = (
+        "Keeps many concurrent keep-alive connections busy against a running "
+        "server and reports throughput, latency percentiles and errors, to "
+        "compare WSGI and ASGI deployments under the same load."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("url", help="Base URL of the server, e.g. http://127.0.0.1:8000.")
+        parser.add_argument(
+            "--path",
+            action="append",
+            dest="paths",
+            help="Requested path, repeat to cycle through several. Defaults to /api/products/.",
+        )
+        parser.add_argument("--connections", type=int, default=1000)
+        parser.add_argument("--duration", type=float, default=30, help="Seconds.")
+        parser.add_argument("--timeout", type=float, default=30, help="Seconds.")
+        parser.add_argument(
+            "--header",
+            action="append",
+            dest="headers",
+            default=[],
+            help='Request header, e.g. "Authorization: Token ...".',
+        )
+        parser.add_argument("--label", help="Name of the run, e.g. wsgi or asgi.")
+        parser.add_argument("--output", help="Path of the JSON results file.")
+
+    def handle(self, *args, **options):
+        url = urlsplit(options["url"])
+
+        if url.scheme != "http" or not url.hostname:
+            raise CommandError("Only plain http:// URLs are supported.")
+
+        limit = raise_open_files_limit(options["connections"] + 64)
+
+        if limit < options["connections"] + 64:
+            self.stderr.write(
+                f"Open files are limited to {limit}, some connections may fail."
+            )
+
+        paths = options["paths"] or ["/api/products/"]
+        headers = "".join(f"{header}\r\n" for header in options["headers"])
+        requests = [
+            (
+                f"GET {path} HTTP/1.1\r\nHost: {url.netloc}\r\n{headers}"
+                "Connection: keep-alive\r\n\r\n"
+            ).encode()
+            for path in paths
+        ]
+
+        self.stdout.write(
+            f"Running {options['connections']} connections against {url.netloc} "
+            f"for {options['duration']:g} s."
+        )
+        latencies, queries, errors = asyncio.run(
+            self.run(
+                url.hostname,
+                url.port or 80,
+                requests,
+                options["connections"],
+                options["duration"],
+                options["timeout"],
+            )
+        )
+
+        if len(latencies) < 2:
+            raise CommandError(f"Too few successful requests, {sum(errors.values())} failed.")
+
+        result = summarize(latencies, queries) | {
+            "throughput": round(len(latencies) / options["duration"], 2),
+            "errors": dict(errors),
+        }
+        report = {
+            "meta": {
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "commit": get_commit(),
+                "label": options["label"],
+                "url": options["url"],
+                "paths": paths,
+                "connections": options["connections"],
+                "duration": options["duration"],
+                "python": platform.python_version(),
+            },
+            "result": result,
+        }
+
+        self.stdout.write(
+            f"{result['requests']} requests, {result['throughput']:.1f} req/s, "
+            f"p50 {result['p50_ms']:.1f} ms, p95 {result['p95_ms']:.1f} ms, "
+            f"p99 {result['p99_ms']:.1f} ms, errors {sum(errors.values())}"
+        )
+
+        if errors:
+            self.stdout.write(f"Errors: {dict(errors)}")
+
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                json.dump(report, file, indent=2)
+                file.write("\n")
+
+            self.stdout.write(f"Saved results to {options['output']}.")
+
+    async def run(
+        self,
+        host: str,
+        port: int,
+        requests: list[bytes],
+        connections: int,
+        duration: float,
+        timeout: float,
+    ) -> tuple[list[float], list[int], dict[str, int]]:
+        """Runs the connections until the duration passes, collecting their results."""
+        latencies, queries, errors = [], [], {}
+        deadline = time.perf_counter() + duration
+
+        async def connect_and_send(offset: int) -> None:
+            reader = writer = None
+
+            for request in cycle(requests[offset:] + requests[:offset]):
+                if time.perf_counter() >= deadline:
+                    break
+
+                try:
+                    if writer is None:
+                        reader, writer = await asyncio.wait_for(
+                            asyncio.open_connection(host, port), timeout
+                        )
+
+                    started = time.perf_counter()
+                    writer.write(request)
+                    await writer.drain()
+                    status, headers = await asyncio.wait_for(read_response(reader), timeout)
+                    latency = time.perf_counter() - started
+                except (OSError, asyncio.IncompleteReadError, TimeoutError) as exc:
+                    errors[type(exc).__name__] = errors.get(type(exc).__name__, 0) + 1
+
+                    if writer is not None:
+                        writer.close()
+
+                    reader = writer = None
+                    await asyncio.sleep(0.1)
+                    continue
+
+                if status >= 400:
+                    errors[str(status)] = errors.get(str(status), 0) + 1
+                else:
+                    latencies.append(latency)
+
+                    if match := SERVER_TIMING_QUERIES.search(headers.get("server-timing", "")):
+                        queries.append(int(match[1]))
+
+                if headers.get("connection", "").lower() == "close":
+                    writer.close()
+                    reader = writer = None
+
+            if writer is not None:
+                writer.close()
+
+        await asyncio.gather(
+            *(connect_and_send(index % len(requests)) for index in range(connections))
+        )
+        return latencies, queries, errors
@@ -0,0 +1,195 @@
+"""Per-route request metrics kept in process memory and their Prometheus export."""
+
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from api.cache import auth_tokens, cart_ids, catalog_cache
+
+# Upper bounds of the request latency histogram in seconds.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Placeholder lists of `IN (...)` and `VALUES (...), (...)` clauses.
+PLACEHOLDERS = re.compile(r"\((?:%s, )*%s\)(?:, \((?:%s, )*%s\))*")
+
+
+def get_shape(sql: str) -> str:
+    """Returns the SQL with placeholder lists collapsed, so batches of any size match."""
+    return PLACEHOLDERS.sub("(...)", sql)
+
+
+@dataclass
+class RequestTimings:
+    """
+    Database and serialization cost of a single request.
+
+    Installed as a database execute wrapper, it counts and times every query
+    and remembers how often each SQL shape was executed.
+    """
+
+    started: float = field(default_factory=time.perf_counter)
+    queries: int = 0
+    db: float = 0.0
+    serialize: float = 0.0
+    shapes: Counter = field(default_factory=Counter)
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += time.perf_counter() - started
+            self.queries += 1
+            self.shapes[get_shape(sql)] += 1
+
+    @property
+    def total(self) -> float:
+        return time.perf_counter() - self.started
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """Returns SQL shapes executed at least `threshold` times."""
+        return [(sql, count) for sql, count in self.shapes.items() if count >= threshold]
+
+    def server_timing(self) -> str:
+        """Formats the timings as a `Server-Timing` header value in milliseconds."""
+        return ", ".join(
+            (
+                f'db;dur={self.db * 1000:.2f};desc="{self.queries} queries"',
+                f"serialize;dur={self.serialize * 1000:.2f}",
+                f"total;dur={self.total * 1000:.2f}",
+            )
+        )
+
+
+# Timings of the request handled in the current context, which async code
+# shares with the worker threads running its queries.
+current_timings: ContextVar[RequestTimings | None] = ContextVar(
+    "current_timings", default=None
+)
+
+
+def record_query(execute, sql, params, many, context):
+    """Execute wrapper of every connection, timing queries of the current request."""
+    timings = current_timings.get()
+
+    if timings is None:
+        return execute(sql, params, many, context)
+
+    return timings(execute, sql, params, many, context)
+
+
+@dataclass
+class RouteMetrics:
+    """Accumulated metrics of one route."""
+
+    requests: int = 0
+    queries: int = 0
+    db: float = 0.0
+    serialize: float = 0.0
+    latency: float = 0.0
+    n_plus_one: int = 0
+    buckets: list[int] = field(default_factory=lambda: [0] * len(LATENCY_BUCKETS))
+
+
+class Metrics:
+    """
+    Collects request metrics per route for the local metrics endpoint.
+
+    Metrics are kept per process, so every worker reports its own numbers.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.routes: defaultdict[str, RouteMetrics] = defaultdict(RouteMetrics)
+
+    def observe(self, route: str, timings: RequestTimings, n_plus_one: bool) -> None:
+        """Adds the cost of a finished request to the route's metrics."""
+        latency = timings.total
+
+        with self._lock:
+            metrics = self.routes[route]
+            metrics.requests += 1
+            metrics.queries += timings.queries
+            metrics.db += timings.db
+            metrics.serialize += timings.serialize
+            metrics.latency += latency
+            metrics.n_plus_one += n_plus_one
+
+            for index, bound in enumerate(LATENCY_BUCKETS):
+                if latency <= bound:
+                    metrics.buckets[index] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self.routes.clear()
+
+    def render(self) -> str:
+        """Renders the metrics in the Prometheus text exposition format."""
+        with self._lock:
+            routes = sorted(
+                (route, RouteMetrics(**vars(metrics) | {"buckets": list(metrics.buckets)}))
+                for route, metrics in self.routes.items()
+            )
+
+        lines = []
+
+        def add(name: str, kind: str, help_text: str, samples) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(f"{name}{labels} {value}" for labels, value in samples)
+
+        def per_route(attr: str):
+            return [(f'{{route="{route}"}}', getattr(m, attr)) for route, m in routes]
+
+        add("api_requests_total", "counter", "Handled requests.", per_route("requests"))
+        add("api_db_queries_total", "counter", "Executed SQL queries.", per_route("queries"))
+        add(
+            "api_db_duration_seconds_total",
+            "counter",
+            "Time spent in SQL queries.",
+            per_route("db"),
+        )
+        add(
+            "api_serialize_duration_seconds_total",
+            "counter",
+            "Time spent serializing and rendering responses.",
+            per_route("serialize"),
+        )
+        add(
+            "api_n_plus_one_total",
+            "counter",
+            "Requests repeating an SQL shape above the warning threshold.",
+            per_route("n_plus_one"),
+        )
+
+        samples = []
+        for route, metrics in routes:
+            for bound, count in zip(LATENCY_BUCKETS, metrics.buckets):
+                samples.append((f'_bucket{{route="{route}",le="{bound}"}}', count))
+            samples.append((f'_bucket{{route="{route}",le="+Inf"}}', metrics.requests))
+            samples.append((f'_sum{{route="{route}"}}', metrics.latency))
+            samples.append((f'_count{{route="{route}"}}', metrics.requests))
+        add("api_request_duration_seconds", "histogram", "Request latency.", samples)
+
+        caches = {"catalog": catalog_cache, "cart_ids": cart_ids, "auth_tokens": auth_tokens}
+        add(
+            "api_cache_hits_total",
+            "counter",
+            "Cache lookups that found an entry.",
+            [(f'{{cache="{name}"}}', cache.hits) for name, cache in caches.items()],
+        )
+        add(
+            "api_cache_misses_total",
+            "counter",
+            "Cache lookups that found no entry.",
+            [(f'{{cache="{name}"}}', cache.misses) for name, cache in caches.items()],
+        )
+
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
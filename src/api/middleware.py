@@ -0,0 +1,101 @@
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse
+
+from api.metrics import RequestTimings, current_timings, metrics
+
+logger = logging.getLogger(__name__)
+
+
+class InstrumentationMiddleware:
+    """
+    Records query count, database, serialization and total time of API requests.
+
+    The timings are sent in the `Server-Timing` header and added to the
+    per-route metrics. Requests executing the same SQL shape at least
+    `N_PLUS_ONE_THRESHOLD` times are logged as likely N+1 queries. Rendering
+    of template responses outside the database is timed as serialization;
+    views using `InstrumentedViewMixin` add the time their handlers spend
+    outside the database.
+
+    Queries are recorded through the request's context, so those run by
+    async views in worker threads are counted as well.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response) -> None:
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if self.async_mode:
+            return self.__acall__(request)
+
+        request.timings = timings = RequestTimings()
+        token = current_timings.set(timings)
+
+        try:
+            response = self.get_response(request)
+        finally:
+            current_timings.reset(token)
+
+        return self.record(request, response, timings)
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        request.timings = timings = RequestTimings()
+        token = current_timings.set(timings)
+
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_timings.reset(token)
+
+        return self.record(request, response, timings)
+
+    def record(
+        self, request: HttpRequest, response: HttpResponse, timings: RequestTimings
+    ) -> HttpResponse:
+        """Logs repeated queries, adds the timings to the metrics and the response."""
+        match = request.resolver_match
+
+        if match is None or not match.route.startswith("api/"):
+            return response
+
+        route = match.url_name or match.view_name
+        threshold = settings.N_PLUS_ONE_THRESHOLD
+        repeated = timings.repeated(threshold) if threshold else []
+
+        for sql, count in repeated:
+            logger.warning(
+                "Possible N+1 queries in %s %s (%s): %d executions of %s",
+                request.method,
+                request.path,
+                route,
+                count,
+                sql,
+            )
+
+        metrics.observe(route, timings, n_plus_one=bool(repeated))
+        response["Server-Timing"] = timings.server_timing()
+        return response
+
+    def process_template_response(
+        self, request: HttpRequest, response: HttpResponse
+    ) -> HttpResponse:
+        """Renders the response here to time it, later rendering is a no-op."""
+        timings = getattr(request, "timings", None)
+
+        if timings is not None:
+            started, db = time.perf_counter(), timings.db
+            response.render()
+            timings.serialize += time.perf_counter() - started - (timings.db - db)
+
+        return response
@@ -0,0 +1,143 @@
+from base64 import b64decode, b64encode
+from urllib import parse
+
+from django.db.models import Model, Q, QuerySet
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination
+from rest_framework.request import Request
+from rest_framework.utils.urls import replace_query_param
+from rest_framework.views import APIView
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Keyset pagination over a stable ordering chosen by the client.
+
+    The cursor holds the ordering value and id of the last row, and the next
+    page is fetched with `WHERE (<field>, id) > (<value>, <id>)` instead of an
+    `OFFSET`, so ties on the ordering field never repeat or skip rows, and no
+    total count is computed. Allowed orderings are taken from the view's
+    `ordering_fields`, the primary key is always appended to them.
+    """
+
+    ordering = "id"
+    ordering_param = "ordering"
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+    def get_ordering(self, request: Request, queryset: QuerySet, view: APIView) -> tuple:
+        ordering = request.query_params.get(self.ordering_param, self.ordering)
+
+        if ordering.lstrip("-") not in getattr(view, "ordering_fields", ("id",)):
+            ordering = self.ordering
+
+        if ordering.lstrip("-") == "id":
+            return (ordering,)
+
+        return (ordering, "-id" if ordering.startswith("-") else "id")
+
+    def paginate_queryset(
+        self, queryset: QuerySet, request: Request, view: APIView | None = None
+    ) -> list | None:
+        self.request = request
+        self.page_size = self.get_page_size(request)
+
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+        ordering = self._reversed(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+
+        if self.cursor is not None:
+            queryset = queryset.filter(self._after(ordering, self.cursor.position))
+
+        # One more row tells whether a page follows in the fetched direction.
+        rows = list(queryset[: self.page_size + 1])
+        self.page = rows[: self.page_size]
+        following = len(rows) > self.page_size
+
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, following
+        else:
+            self.has_next, self.has_previous = following, self.cursor is not None
+
+        if self.has_next or self.has_previous:
+            self.display_page_controls = True
+
+        return self.page
+
+    def get_next_link(self) -> str | None:
+        if not self.has_next:
+            return None
+
+        if self.page:
+            position = self._get_position_from_instance(self.page[-1], self.ordering)
+        else:
+            position = self.cursor.position
+
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=position))
+
+    def get_previous_link(self) -> str | None:
+        if not self.has_previous:
+            return None
+
+        if self.page:
+            position = self._get_position_from_instance(self.page[0], self.ordering)
+        else:
+            position = self.cursor.position
+
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=position))
+
+    def decode_cursor(self, request: Request) -> Cursor | None:
+        encoded = request.query_params.get(self.cursor_query_param)
+
+        if encoded is None:
+            return None
+
+        try:
+            querystring = b64decode(encoded.encode("ascii")).decode("ascii")
+            tokens = parse.parse_qs(querystring, keep_blank_values=True)
+            reverse = bool(int(tokens.get("r", ["0"])[0]))
+            pk = int(tokens["i"][0])
+            value = tokens["p"][0] if len(self.ordering) > 1 else pk
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+
+        return Cursor(offset=0, reverse=reverse, position=(value, pk))
+
+    def encode_cursor(self, cursor: Cursor) -> str:
+        value, pk = cursor.position
+        tokens = {"i": pk}
+
+        if len(self.ordering) > 1:
+            tokens["p"] = value
+
+        if cursor.reverse:
+            tokens["r"] = "1"
+
+        querystring = parse.urlencode(tokens)
+        encoded = b64encode(querystring.encode("ascii")).decode("ascii")
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def _get_position_from_instance(self, instance: Model, ordering: tuple) -> tuple:
+        return str(getattr(instance, ordering[0].lstrip("-"))), instance.pk
+
+    @staticmethod
+    def _reversed(ordering: tuple) -> tuple:
+        return tuple(field[1:] if field.startswith("-") else f"-{field}" for field in ordering)
+
+    @staticmethod
+    def _after(ordering: tuple, position: tuple) -> Q:
+        """Returns the condition of rows following the position in the ordering."""
+        value, pk = position
+        field, lookup = ordering[0].lstrip("-"), "lt" if ordering[0].startswith("-") else "gt"
+
+        if field == "id":
+            return Q(**{f"pk__{lookup}": pk})
+
+        return Q(**{f"{field}__{lookup}": value}) | Q(**{field: value, f"pk__{lookup}": pk})
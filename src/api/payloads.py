@@ -0,0 +1,80 @@
+from collections.abc import Iterable
+
+from asgiref.sync import sync_to_async
+from django.db.models import BooleanField, Case, F, QuerySet, Value, When
+
+from api.renderers import JSONRenderer, RawJSON
+from api.serializers.product import ProductReadSerializer
+from products.models import Product
+
+
+def with_payloads(queryset: QuerySet, *fields: str) -> QuerySet:
+    """
+    Loads only the stored payload of products, the given fields and whether
+    the payload is stale.
+
+    Every change of a product or of the names it embeds touches `updated_at`,
+    so a payload built for another value of it has to be rebuilt.
+    """
+    return queryset.only("id", "payload", *fields).annotate(
+        payload_stale=Case(
+            When(payload_updated_at=F("updated_at"), then=Value(False)),
+            default=Value(True),
+            output_field=BooleanField(),
+        )
+    )
+
+
+def build_payload(product: Product) -> str:
+    """Serializes a product with its subcategory and category loaded."""
+    return JSONRenderer().render(ProductReadSerializer(product).data).decode()
+
+
+def refresh_payloads(product_ids: Iterable[int]) -> dict[int, Product]:
+    """Rebuilds and stores payloads of the given products, returning them by id."""
+    products = Product.objects.select_related("subcategory__category").in_bulk(
+        product_ids
+    )
+
+    for product in products.values():
+        product.payload = build_payload(product)
+        product.payload_updated_at = product.updated_at
+
+    Product.objects.bulk_update(products.values(), ("payload", "payload_updated_at"))
+    return products
+
+
+def get_payloads(products: Iterable[Product]) -> list[RawJSON]:
+    """
+    Returns stored payloads of products loaded by `with_payloads` in order.
+
+    Stale payloads are rebuilt and stored in one batch.
+    """
+    products = list(products)
+    stale_ids = [product.pk for product in products if product.payload_stale]
+    return join_payloads(products, refresh_payloads(stale_ids) if stale_ids else {})
+
+
+async def aget_payloads(products: QuerySet | Iterable[Product]) -> list[RawJSON]:
+    """
+    Asynchronous version of `get_payloads`, iterating querysets asynchronously.
+
+    Stale payloads are rebuilt in a worker thread, since that needs a transaction.
+    """
+    if isinstance(products, QuerySet):
+        products = [product async for product in products]
+    else:
+        products = list(products)
+
+    stale_ids = [product.pk for product in products if product.payload_stale]
+    refreshed = await sync_to_async(refresh_payloads)(stale_ids) if stale_ids else {}
+    return join_payloads(products, refreshed)
+
+
+def join_payloads(products: list[Product], refreshed: dict[int, Product]) -> list[RawJSON]:
+    """Returns payloads of the products, taking rebuilt ones from `refreshed`."""
+    return [
+        RawJSON(refreshed.get(product.pk, product).payload)
+        for product in products
+        if product.pk in refreshed or product.payload
+    ]
@@ -0,0 +1,163 @@
+import json
+from collections.abc import Iterable, Iterator
+from functools import cached_property
+from itertools import islice
+
+from rest_framework import renderers
+from rest_framework.compat import LONG_SEPARATORS, SHORT_SEPARATORS
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Number of list items encoded at once when streaming.
+STREAM_BATCH_SIZE = 100
+
+# Datetimes are left to the DRF encoder's `default`, so they are formatted as in DRF.
+ORJSON_OPTIONS = (
+    orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS if orjson else None
+)
+
+
+class RawJSON(str):
+    """Already encoded JSON value, embedded into responses as is."""
+
+
+def batched(items: Iterable, size: int) -> Iterator[list]:
+    """Splits an iterable into lists of at most `size` items."""
+    iterator = iter(items)
+
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def has_fragments(data, depth: int = 2) -> bool:
+    """Checks whether the data or its members up to `depth` levels are fragments."""
+    if isinstance(data, RawJSON):
+        return True
+
+    if not depth:
+        return False
+
+    if isinstance(data, dict):
+        data = data.values()
+    elif not isinstance(data, list):
+        return False
+
+    return any(has_fragments(item, depth - 1) for item in data)
+
+
+class JSONRenderer(renderers.JSONRenderer):
+    """
+    JSON renderer that splices pre-serialized `RawJSON` fragments into the output.
+
+    Fragments may be the response data, its members or members of those, which
+    covers detail, list and paginated responses. Compact output is encoded with
+    orjson when it is installed and with the standard library otherwise;
+    indented output is left to DRF.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None) -> bytes:
+        if data is None:
+            return b""
+
+        if has_fragments(data):
+            return self.splice(data)
+
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        return self.encode(data)
+
+    def splice(self, data) -> bytes:
+        """Encodes the data, copying fragments instead of encoding them."""
+        if isinstance(data, RawJSON):
+            return data.encode()
+
+        if isinstance(data, list) and has_fragments(data):
+            return b"[" + b",".join(self.splice(item) for item in data) + b"]"
+
+        if isinstance(data, dict) and has_fragments(data):
+            return (
+                b"{"
+                + b",".join(
+                    self.encode(str(key)) + b":" + self.splice(value)
+                    for key, value in data.items()
+                )
+                + b"}"
+            )
+
+        return self.encode(data)
+
+    def stream(self, data, chunk_size: int) -> Iterator[bytes]:
+        """
+        Encodes the data in chunks of about `chunk_size` bytes.
+
+        Lists and other iterables are encoded item by item, so their items may
+        be produced lazily, e.g. by a queryset iterator.
+        """
+        chunk, size = [], 0
+
+        for part in self.iter_parts(data):
+            chunk.append(part)
+            size += len(part)
+
+            if size >= chunk_size:
+                yield b"".join(chunk)
+                chunk, size = [], 0
+
+        if chunk:
+            yield b"".join(chunk)
+
+    def iter_parts(self, data, top: bool = True) -> Iterator[bytes]:
+        """Yields the encoded data, splitting the top dict and iterables."""
+        if top and isinstance(data, dict):
+            yield b"{"
+
+            for index, (key, value) in enumerate(data.items()):
+                yield (b"," if index else b"") + self.encode(str(key)) + b":"
+                yield from self.iter_parts(value, top=False)
+
+            yield b"}"
+        elif isinstance(data, Iterable) and not isinstance(data, (str, bytes, dict)):
+            yield b"["
+
+            for index, items in enumerate(batched(data, STREAM_BATCH_SIZE)):
+                if has_fragments(items, depth=1):
+                    encoded = self.splice(items)
+                else:
+                    encoded = self.encode(items)
+
+                yield (b"," if index else b"") + encoded[1:-1]
+
+            yield b"]"
+        else:
+            yield self.splice(data)
+
+    @cached_property
+    def default(self):
+        """Returns the fallback of the DRF encoder for types orjson passes through."""
+        return self.encoder_class().default
+
+    def encode(self, data) -> bytes:
+        """Encodes plain data without indentation the same way DRF does."""
+        if orjson is not None and self.compact and not self.ensure_ascii:
+            try:
+                encoded = orjson.dumps(data, default=self.default, option=ORJSON_OPTIONS)
+            except orjson.JSONEncodeError:
+                pass
+            else:
+                return encoded.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+                    b"\xe2\x80\xa9", b"\\u2029"
+                )
+
+        encoded = json.dumps(
+            data,
+            cls=self.encoder_class,
+            ensure_ascii=self.ensure_ascii,
+            allow_nan=not self.strict,
+            separators=SHORT_SEPARATORS if self.compact else LONG_SEPARATORS,
+        )
+        # Like DRF, keep the output a strict JavaScript subset.
+        return encoded.replace("\u2028", "\\u2028").replace("\u2029", "\\u2029").encode()
@@ -1,14 +1,35 @@
 from decimal import Decimal
-from django.db.models import Sum, F, DecimalField
+
+from django.db.models import Prefetch, aprefetch_related_objects, prefetch_related_objects
 from rest_framework import serializers
 
-from api.constants import MIN_QUANTITY
+from api.constants import MAX_BATCH_OPERATIONS, MAX_ID, MIN_QUANTITY, CartOperation
+from api.serializers.base import ReadOnlyModelSerializer
 from api.serializers.product import ProductReadSerializer
 from cart.models import Cart, CartItem
 from products.models import Product
 
 
-class CartItemReadSerializer(serializers.ModelSerializer):
+def get_cart_items_prefetch() -> Prefetch:
+    return Prefetch(
+        "cart_items",
+        queryset=CartItem.objects.select_related("product__subcategory__category"),
+    )
+
+
+def prefetch_cart_items(cart: Cart) -> Cart:
+    """Loads cart items with their products, subcategories and categories in one query."""
+    prefetch_related_objects([cart], get_cart_items_prefetch())
+    return cart
+
+
+async def aprefetch_cart_items(cart: Cart) -> Cart:
+    """Asynchronous version of `prefetch_cart_items`."""
+    await aprefetch_related_objects([cart], get_cart_items_prefetch())
+    return cart
+
+
+class CartItemReadSerializer(ReadOnlyModelSerializer):
     """Serializer for reading CartItem instances"""
 
     product = ProductReadSerializer()
@@ -30,8 +51,55 @@ class CartItemWriteSerializer(serializers.ModelSerializer):
         fields = ("product", "quantity")
 
 
-class CartReadSerializer(serializers.ModelSerializer):
-    """Serializer for reading Cart instances"""
+class CartOperationSerializer(serializers.Serializer):
+    """Serializer for a single operation of a batch cart update."""
+
+    product = serializers.IntegerField(min_value=1, max_value=MAX_ID, help_text="Product id.")
+    quantity = serializers.IntegerField(
+        min_value=MIN_QUANTITY,
+        required=False,
+        help_text="Quantity to add or set, not used for removal.",
+    )
+    op = serializers.ChoiceField(choices=CartOperation.CHOICES, default=CartOperation.ADD)
+
+    def validate(self, attrs: dict) -> dict:
+        if attrs["op"] != CartOperation.REMOVE and "quantity" not in attrs:
+            raise serializers.ValidationError({"quantity": "This field is required."})
+
+        return attrs
+
+
+class CartBatchSerializer(serializers.Serializer):
+    """Serializer for a batch of cart operations applied in order."""
+
+    operations = CartOperationSerializer(
+        many=True,
+        allow_empty=False,
+        max_length=MAX_BATCH_OPERATIONS,
+    )
+
+    def validate_operations(self, operations: list[dict]) -> list[dict]:
+        """Checks product ids of all operations with a single query."""
+        product_ids = {operation["product"] for operation in operations}
+        missing = product_ids - set(
+            Product.objects.filter(pk__in=product_ids).values_list("pk", flat=True)
+        )
+
+        if missing:
+            raise serializers.ValidationError(
+                f"Invalid product ids: {', '.join(map(str, sorted(missing)))}."
+            )
+
+        return operations
+
+
+class CartReadSerializer(ReadOnlyModelSerializer):
+    """
+    Serializer for reading Cart instances.
+
+    Expects the cart to be passed through `prefetch_cart_items`, so items are
+    built from the already fetched rows. Totals are materialized on the cart.
+    """
 
     items = CartItemReadSerializer(source="cart_items", many=True)
     total_quantity = serializers.SerializerMethodField()
@@ -42,13 +110,10 @@ class CartReadSerializer(serializers.ModelSerializer):
         fields = ("id", "user", "items", "total_quantity", "total_price")
         read_only_fields = fields
 
-    def get_total_quantity(self, cart: Cart):
-        """Calculates the total quantity of all items in the cart."""
-        return cart.cart_items.aggregate(total=Sum("quantity"))["total"] or 0
+    def get_total_quantity(self, cart: Cart) -> int:
+        """Returns the total quantity of all items in the cart."""
+        return cart.total_quantity
 
     def get_total_price(self, cart: Cart) -> Decimal:
-        """Calculates the total price of all items in the cart."""
-        total = cart.cart_items.aggregate(
-            total=Sum(F("quantity") * F("product__price"), output_field=DecimalField())
-        )["total"]
-        return total or Decimal("0.00")
+        """Returns the total price of all items in the cart."""
+        return cart.total_price
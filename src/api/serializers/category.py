@@ -1,9 +1,8 @@
-from rest_framework import serializers
-
+from api.serializers.base import ReadOnlyModelSerializer
 from categories.models import Category, SubCategory
 
 
-class SubCategoryReadSerializer(serializers.ModelSerializer):
+class SubCategoryReadSerializer(ReadOnlyModelSerializer):
     """Serializer for reading SubCategory instances."""
 
     class Meta:
@@ -12,7 +11,7 @@ class SubCategoryReadSerializer(serializers.ModelSerializer):
         read_only_fields = fields
 
 
-class CategoryReadSerializer(serializers.ModelSerializer):
+class CategoryReadSerializer(ReadOnlyModelSerializer):
     """Serializer for reading Category instances, including their subcategories."""
 
     subcategories = SubCategoryReadSerializer(many=True)
@@ -1,9 +1,12 @@
-from django.http import HttpRequest
 from rest_framework import serializers
+
+from api.constants import MAX_SEARCH_LIMIT, SEARCH_LIMIT
+from api.serializers.base import ReadOnlyModelSerializer
+from products.constants import ExportFormat, ImageStatus
 from products.models import Product
 
 
-class ProductReadSerializer(serializers.ModelSerializer):
+class ProductReadSerializer(ReadOnlyModelSerializer):
     """Serializer for reading Product instances"""
 
     category = serializers.CharField(source="subcategory.category.name")
@@ -11,17 +14,60 @@ class ProductReadSerializer(serializers.ModelSerializer):
     images = serializers.SerializerMethodField()
 
     def get_images(self, obj: Product) -> dict[str, str]:
-        """Generates absolute URLs for product images in different sizes."""
-        request: HttpRequest = self.context["request"]
+        """
+        Generates host-relative URLs for product images in different sizes.
+
+        URLs do not depend on the request, so the representation can be stored.
+        Falls back to the original image until the derivatives are ready.
+        """
+        original = obj.image.url
+
+        if obj.image_status != ImageStatus.READY:
+            return {
+                "original": original,
+                "small": original,
+                "medium": original,
+                "large": original,
+            }
 
         return {
-            "original": request.build_absolute_uri(obj.image.url),
-            "small": request.build_absolute_uri(obj.image_small.url),
-            "medium": request.build_absolute_uri(obj.image_medium.url),
-            "large": request.build_absolute_uri(obj.image_large.url),
+            "original": original,
+            "small": obj.image_small.url,
+            "medium": obj.image_medium.url,
+            "large": obj.image_large.url,
         }
 
     class Meta:
         model = Product
         fields = ("id", "name", "slug", "category", "subcategory", "price", "images")
         read_only_fields = fields
+
+
+class ProductSearchSerializer(serializers.Serializer):
+    """Serializer for product search query parameters."""
+
+    q = serializers.CharField(help_text="Words or word prefixes to search for.")
+    limit = serializers.IntegerField(
+        min_value=1,
+        max_value=MAX_SEARCH_LIMIT,
+        default=SEARCH_LIMIT,
+        help_text="Maximum number of products to return.",
+    )
+
+
+class CatalogExportSerializer(serializers.Serializer):
+    """Serializer for catalog export query parameters."""
+
+    export_format = serializers.ChoiceField(
+        choices=ExportFormat.choices,
+        default=ExportFormat.JSONL,
+        help_text="Format of the exported rows.",
+    )
+    since = serializers.DateTimeField(
+        required=False,
+        help_text="Only export products changed at or after this time.",
+    )
+    gzip = serializers.BooleanField(
+        default=False,
+        help_text="Compress the export with gzip.",
+    )
@@ -0,0 +1,79 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from api.cache import auth_tokens, cart_ids, catalog_cache, token_revocations
+from api.metrics import record_query
+from cart.models import Cart
+from categories.models import Category, SubCategory
+from products.models import Product
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=SubCategory)
+@receiver(post_delete, sender=SubCategory)
+def bump_catalog_version(**kwargs) -> None:
+    """Invalidates cached catalog payloads whenever categories change."""
+    catalog_cache.bump()
+
+
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=SubCategory)
+@receiver(post_delete, sender=Product)
+def record_catalog_deletion(**kwargs) -> None:
+    """Moves the Last-Modified time of catalog lists, once the deletion is visible."""
+    transaction.on_commit(catalog_cache.record_deletion, robust=True)
+
+
+@receiver(post_delete, sender=Cart)
+def forget_cart_id(instance: Cart, **kwargs) -> None:
+    """Drops the cached cart id of a deleted cart."""
+    cart_ids.delete(instance.user_id)
+
+
+@receiver(post_delete, sender=Token)
+def forget_token(instance: Token, **kwargs) -> None:
+    """Stops accepting a deleted token in every process, e.g. after logout."""
+    auth_tokens.delete(instance.key)
+    # Recorded after commit, so tokens other processes load meanwhile are covered.
+    transaction.on_commit(lambda: token_revocations.revoke(instance.user_id), robust=True)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def forget_user_tokens(instance, created: bool, **kwargs) -> None:
+    """Revokes cached tokens of a changed user in every process, e.g. a deactivated one."""
+    if not created:
+        for key in Token.objects.filter(user=instance).values_list("key", flat=True):
+            auth_tokens.delete(key)
+
+        transaction.on_commit(lambda: token_revocations.revoke(instance.pk), robust=True)
+
+
+@receiver(connection_created)
+def install_query_recorder(connection, **kwargs) -> None:
+    """Times queries of instrumented requests on every connection and thread."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@receiver(connection_created)
+def apply_sqlite_pragmas(connection, **kwargs) -> None:
+    """Tunes new SQLite connections for concurrent readers and writers."""
+    if connection.vendor == "sqlite":
+        # The raw connection keeps pragmas out of query logs and timings.
+        database = connection.connection
+
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            # The journal mode is kept in the file, and changing it needs an
+            # exclusive lock, which concurrent writers would make fail.
+            if name == "journal_mode":
+                (current,) = database.execute("PRAGMA journal_mode").fetchone()
+
+                if current.lower() == str(value).lower():
+                    continue
+
+            database.execute(f"PRAGMA {name} = {value}")
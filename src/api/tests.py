@@ -1,16 +1,59 @@
+import csv
+import gzip
+import json
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import timedelta
 from decimal import Decimal
+from functools import wraps
 import io
+import os
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from unittest import mock
 
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.urls import reverse
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ValidationError
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+from django.utils import timezone
+from django.utils.http import parse_http_date
 from django.core.files.uploadedfile import SimpleUploadedFile
-from rest_framework import status
+from rest_framework import serializers, status
 from rest_framework.authtoken.models import Token
-from rest_framework.test import APITestCase
+from rest_framework.settings import api_settings
+from rest_framework.test import APIClient, APITestCase, APITransactionTestCase
+from rest_framework.views import APIView
+from rest_framework_simplejwt.tokens import RefreshToken
 from PIL import Image
 
+from api.cache import auth_tokens, cart_ids
+from api.metrics import metrics
+from api.payloads import refresh_payloads
+from api.middleware import InstrumentationMiddleware
+from api.renderers import JSONRenderer, RawJSON
+from api.views.cart import AsyncCartAPIView, AsyncCartBatchAPIView
+from api.views.category import AsyncCategoryViewSet
+from api.views.media import IMMUTABLE_CACHE_CONTROL
+from api.views.product import AsyncProductViewSet, ProductViewSet
+from api.serializers.base import ReadOnlyModelSerializer
+from api.serializers.product import ProductReadSerializer
 from cart.models import Cart, CartItem
 from categories.models import Category, SubCategory
+from products import images, search
+from products.constants import RESERVED_SLUGS, ImageStatus
 from products.models import Product
 
 User = get_user_model()
@@ -24,6 +67,95 @@ def get_temporary_image(name: str) -> SimpleUploadedFile:
     return SimpleUploadedFile(name, byte_arr.read(), content_type="image/jpeg")
 
 
+@contextmanager
+def authentication_classes(*classes: str) -> Iterator[None]:
+    """Runs the block with other `DEFAULT_AUTHENTICATION_CLASSES`."""
+    with override_settings(
+        REST_FRAMEWORK=settings.REST_FRAMEWORK
+        | {"DEFAULT_AUTHENTICATION_CLASSES": list(classes)}
+    ):
+        # Views copy the default classes when they are defined.
+        with mock.patch.object(
+            APIView, "authentication_classes", api_settings.DEFAULT_AUTHENTICATION_CLASSES
+        ):
+            yield
+
+
+def measure_call(call) -> tuple[int, int]:
+    """Makes the call, reading a streamed body, and returns its query count and peak memory."""
+    tracing = tracemalloc.is_tracing()
+
+    if not tracing:
+        tracemalloc.start()
+
+    tracemalloc.reset_peak()
+    baseline = tracemalloc.get_traced_memory()[0]
+
+    try:
+        with CaptureQueriesContext(connection) as queries:
+            response = call()
+
+            if response.streaming:
+                b"".join(response.streaming_content)
+
+        peak = tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        if not tracing:
+            tracemalloc.stop()
+
+    assert response.status_code < 400, response.status_code
+    return len(queries), peak
+
+
+def query_budget(queries: int, memory: int, sizes: tuple[int, ...] = (1, 10, 100)):
+    """
+    Checks the query count and memory of an endpoint call for several data sizes.
+
+    The decorated test takes a data size, prepares that many rows and returns
+    a function making the call under test. The call may execute at most
+    `queries` queries and allocate at most `memory` bytes at peak, and must
+    execute the same number of queries for every size, so N+1 patterns fail.
+    """
+
+    def decorator(test):
+        @wraps(test)
+        def wrapper(self):
+            counts = {}
+
+            for size in sizes:
+                call = test(self, size)
+
+                with self.subTest(size=size):
+                    counts[size], peak = measure_call(call)
+                    self.assertLessEqual(counts[size], queries, "Query budget exceeded.")
+                    self.assertLessEqual(peak, memory, "Memory budget exceeded.")
+
+            self.assertEqual(
+                len(set(counts.values())),
+                1,
+                f"Query count grows with data size: {counts}.",
+            )
+
+        return wrapper
+
+    return decorator
+
+
+def call_async_view(view, request, **kwargs) -> tuple[HttpResponse, bytes]:
+    """Serves the request with an async view as an ASGI server would and reads the body."""
+    assert iscoroutinefunction(view)
+
+    async def serve():
+        response = await view(request, **kwargs)
+
+        if not response.streaming:
+            return response, response.content
+
+        return response, b"".join([chunk async for chunk in response.streaming_content])
+
+    return async_to_sync(serve)()
+
+
 class CartAPITestCase(APITestCase):
     @classmethod
     def setUpTestData(cls):
@@ -57,10 +189,21 @@ class CartAPITestCase(APITestCase):
             subcategory=cls.subcategory,
             image=cls.product2_image,
         )
+        cls.products = [cls.product, cls.product2] + Product.objects.bulk_create(
+            Product(
+                name=f"Bulk Product {index}",
+                price=Decimal("10.00"),
+                slug=f"bulk-product-{index}",
+                subcategory=cls.subcategory,
+                image=cls.product.image.name,
+            )
+            for index in range(99)
+        )
 
         cls.cart_url = reverse("cart")
 
     def setUp(self):
+        cart_ids.clear()
         self.user = User.objects.create_user(
             username="testuser",
             password="password123",
@@ -111,6 +254,249 @@ class CartAPITestCase(APITestCase):
         cart_item = CartItem.objects.get(cart=cart, product=self.product)
         self.assertEqual(cart_item.quantity, 2)
 
+    def test_totals_follow_item_changes(self):
+        """Verify materialized totals follow item updates, removals and price changes."""
+        response = self.client.post(
+            self.cart_url, {"product": self.product.pk, "quantity": 2}
+        )
+        item_url = reverse("cart-item", args=(response.data["items"][0]["id"],))
+        self.client.post(self.cart_url, {"product": self.product2.pk, "quantity": 1})
+
+        response = self.client.put(item_url, {"product": self.product.pk, "quantity": 5})
+        self.assertEqual(response.data["total_quantity"], 6)
+        self.assertEqual(
+            response.data["total_price"], 5 * self.product.price + self.product2.price
+        )
+
+        self.product2.price = Decimal("1.00")
+        self.product2.save()
+        cart = Cart.objects.get(user=self.user)
+        self.assertEqual(cart.total_price, 5 * self.product.price + Decimal("1.00"))
+
+        self.client.delete(item_url)
+        cart.refresh_from_db()
+        self.assertEqual(
+            (cart.total_quantity, cart.total_price, cart.items_count),
+            (1, Decimal("1.00"), 1),
+        )
+
+    def test_totals_follow_only_price_changes(self):
+        """Verify product saves recalculate cart totals only when the price changed."""
+        self.client.post(self.cart_url, {"product": self.product.pk, "quantity": 2})
+        carts = Cart.objects.filter(user=self.user)
+        carts.update(total_price=0)
+        product = Product.objects.get(pk=self.product.pk)
+
+        product.name = "Renamed"
+        product.save()
+        self.assertEqual(carts.get().total_price, 0)
+
+        product.price = Decimal("3.00")
+        product.save(update_fields=["name"])
+        self.assertEqual(carts.get().total_price, 0)
+
+        product.save()
+        self.assertEqual(carts.get().total_price, Decimal("6.00"))
+
+        carts.update(total_price=0)
+        product.save()
+        self.assertEqual(carts.get().total_price, 0)
+
+    def test_check_cart_totals_repairs_drift(self):
+        """Verify the command finds and repairs drifted cart totals."""
+        self.client.post(self.cart_url, {"product": self.product.pk, "quantity": 2})
+        Cart.objects.filter(user=self.user).update(total_quantity=100)
+
+        out = io.StringIO()
+        call_command("check_cart_totals", repair=True, stdout=out)
+
+        self.assertIn("1 carts have drifted totals.", out.getvalue())
+        self.assertEqual(Cart.objects.get(user=self.user).total_quantity, 2)
+
+    def test_batch_update(self):
+        """Verify batch operations are applied in order and the cart is returned once."""
+        self.client.post(self.cart_url, {"product": self.product.pk, "quantity": 1})
+        operations = [
+            {"product": self.product.pk, "quantity": 2},
+            {"product": self.product2.pk, "quantity": 4, "op": "set"},
+            {"product": self.product2.pk, "quantity": 1, "op": "add"},
+        ]
+
+        response = self.client.post(
+            reverse("cart-batch"), {"operations": operations}, format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        quantities = {item["product"]["id"]: item["quantity"] for item in response.data["items"]}
+        self.assertEqual(quantities, {self.product.pk: 3, self.product2.pk: 5})
+        self.assertEqual(
+            response.data["total_price"],
+            3 * self.product.price + 5 * self.product2.price,
+        )
+
+        response = self.client.post(
+            reverse("cart-batch"),
+            {"operations": [{"product": self.product.pk, "op": "remove"}]},
+            format="json",
+        )
+        self.assertEqual(response.data["total_quantity"], 5)
+
+    def test_batch_update_invalid_product(self):
+        """Check a batch with an unknown product is rejected as a whole."""
+        for product_id in (10**6, 10**30, 0, -1):
+            with self.subTest(product_id=product_id):
+                operations = [
+                    {"product": self.product.pk, "quantity": 1},
+                    {"product": product_id, "quantity": 1},
+                ]
+                response = self.client.post(
+                    reverse("cart-batch"), {"operations": operations}, format="json"
+                )
+
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertIn("operations", response.data)
+                self.assertFalse(CartItem.objects.filter(cart__user=self.user).exists())
+
+    def test_cart_created_with_user(self):
+        """Verify the cart is created eagerly and then addressed by a cached id."""
+        cart = Cart.objects.get(user=self.user)
+        self.client.get(self.cart_url)
+
+        self.assertEqual(cart_ids.get(self.user.pk), cart.pk)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.delete(self.cart_url)
+
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(
+            any(query["sql"].startswith('SELECT "cart_cart"') for query in queries)
+        )
+
+    def test_stale_cart_id_is_replaced(self):
+        """Verify changes go to a new cart when the cached one was deleted elsewhere."""
+        self.client.get(self.cart_url)
+        stale_id = Cart.objects.get(user=self.user).pk
+
+        operation = {"op": "add", "product": self.product.pk, "quantity": 2}
+
+        for url, data, expected_status in (
+            (self.cart_url, {"product": self.product.pk, "quantity": 2}, 201),
+            (reverse("cart-batch"), {"operations": [operation]}, 200),
+        ):
+            with self.subTest(url=url):
+                Cart.objects.filter(user=self.user).delete()
+                # Another process still has the id cached.
+                cart_ids.set(self.user.pk, stale_id)
+
+                response = self.client.post(url, data, format="json")
+
+                self.assertEqual(response.status_code, expected_status)
+                cart = Cart.objects.get(user=self.user)
+                self.assertNotEqual(cart.pk, stale_id)
+                self.assertEqual(cart_ids.get(self.user.pk), cart.pk)
+                self.assertEqual(cart.total_quantity, 2)
+                self.assertEqual(cart.cart_items.get().quantity, 2)
+                stale_id = cart.pk
+
+    def test_clearing_replaces_stale_cart_id(self):
+        """Verify clearing reaches the current cart when the cached one was deleted."""
+        self.client.get(self.cart_url)
+        stale_id = Cart.objects.get(user=self.user).pk
+        Cart.objects.filter(user=self.user).delete()
+        # Another process recreated the cart and added to it.
+        self.client.post(self.cart_url, {"product": self.product.pk, "quantity": 2})
+        cart = Cart.objects.get(user=self.user)
+        cart_ids.set(self.user.pk, stale_id)
+
+        response = self.client.delete(self.cart_url)
+
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        cart.refresh_from_db()
+        self.assertEqual(cart_ids.get(self.user.pk), cart.pk)
+        self.assertEqual((cart.total_quantity, cart.cart_items.count()), (0, 0))
+
+    def test_token_lookup_is_cached(self):
+        """Verify repeated requests skip the token query until the token changes."""
+        self.client.get(self.cart_url)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.cart_url)
+
+        self.assertFalse(any("authtoken_token" in query["sql"] for query in queries))
+
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get(self.cart_url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.user.is_active = True
+        self.user.save()
+        self.client.get(self.cart_url)
+        self.token.delete()
+        response = self.client.get(self.cart_url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_token_revocation_reaches_other_processes(self):
+        """Verify tokens still cached by another process are revoked as well."""
+        key = self.token.key
+
+        def deactivate():
+            self.user.is_active = False
+            self.user.save()
+
+        for revoke in (deactivate, self.token.delete):
+            with self.subTest(revoke=revoke):
+                self.client.get(self.cart_url)
+                entry = auth_tokens.get(key)
+
+                with self.captureOnCommitCallbacks(execute=True):
+                    revoke()
+
+                # Another process still holds the entry cached before the change.
+                auth_tokens.set(key, entry)
+                response = self.client.get(self.cart_url)
+                self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+                self.user.is_active = True
+                User.objects.filter(pk=self.user.pk).update(is_active=True)
+
+    def test_cart_matches_drf_representation(self):
+        """Verify the compiled cart representation renders the same bytes as DRF."""
+        self.client.post(self.cart_url, {"product": self.product.pk, "quantity": 2})
+        self.client.post(self.cart_url, {"product": self.product2.pk, "quantity": 1})
+        content = self.client.get(self.cart_url).content
+
+        with mock.patch.object(
+            ReadOnlyModelSerializer,
+            "to_representation",
+            serializers.ModelSerializer.to_representation,
+        ):
+            self.assertEqual(self.client.get(self.cart_url).content, content)
+
+    def test_jwt_access_token(self):
+        """Verify JWT access tokens are accepted without auth queries only when enabled."""
+        access = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+
+        with authentication_classes("api.authentication.CachedTokenAuthentication"):
+            response = self.client.get(self.cart_url)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        with authentication_classes(
+            "api.authentication.StatelessJWTAuthentication",
+            "api.authentication.CachedTokenAuthentication",
+        ):
+            self.client.post(self.cart_url, {"product": self.product.pk, "quantity": 2})
+
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(self.cart_url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["user"], self.user.pk)
+        self.assertEqual(response.data["total_quantity"], 2)
+        self.assertFalse(any("auth" in query["sql"] for query in queries))
+
     def test_get_cart_unauthorized(self):
         """Check that an unauthorized user cannot access the cart endpoint."""
         self.client.credentials()
@@ -129,3 +515,963 @@ class CartAPITestCase(APITestCase):
         data = {"quantity": 5}
         response = self.client.put(reverse("cart-item", args=(10**1000,)), data)
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def fill_cart(self, size: int) -> Cart:
+        """Fills the user's cart with `size` items and warms up the lookup caches."""
+        cart = Cart.objects.get(user=self.user)
+        CartItem.objects.filter(cart=cart).delete()
+        CartItem.objects.bulk_create(
+            CartItem(cart=cart, product=product, quantity=2)
+            for product in self.products[:size]
+        )
+        Cart.objects.filter(pk=cart.pk).recalculate_totals()
+
+        # Token and cart id cache misses cost extra queries.
+        self.client.get(self.cart_url)
+        return cart
+
+    @query_budget(queries=2, memory=1024 * 1024)
+    def test_cart_read_query_count_does_not_grow(self, size):
+        """Ensure reading the cart costs a constant number of queries."""
+        self.fill_cart(size)
+
+        def get_cart():
+            response = self.client.get(self.cart_url)
+            self.assertEqual(len(response.data["items"]), size)
+            self.assertEqual(response.data["total_quantity"], 2 * size)
+            return response
+
+        return get_cart
+
+    @query_budget(queries=10, memory=1024 * 1024)
+    def test_cart_add_budget(self, size):
+        """Ensure adding an item costs the same for carts of any size."""
+        self.fill_cart(size)
+        data = {"product": self.products[size].pk, "quantity": 1}
+        return lambda: self.client.post(self.cart_url, data)
+
+    @query_budget(queries=8, memory=1024 * 1024)
+    def test_cart_item_update_budget(self, size):
+        """Ensure updating an item costs the same for carts of any size."""
+        item = self.fill_cart(size).cart_items.first()
+        url = reverse("cart-item", args=(item.pk,))
+        data = {"product": item.product_id, "quantity": 5}
+        return lambda: self.client.put(url, data)
+
+    @query_budget(queries=5, memory=256 * 1024)
+    def test_cart_item_delete_budget(self, size):
+        """Ensure removing an item costs the same for carts of any size."""
+        item = self.fill_cart(size).cart_items.first()
+        return lambda: self.client.delete(reverse("cart-item", args=(item.pk,)))
+
+    @query_budget(queries=4, memory=256 * 1024)
+    def test_cart_clear_budget(self, size):
+        """Ensure clearing the cart costs the same for carts of any size."""
+        self.fill_cart(size)
+        return lambda: self.client.delete(self.cart_url)
+
+    @query_budget(queries=9, memory=1024 * 1024)
+    def test_cart_batch_budget(self, size):
+        """Ensure a batch costs the same for any number of items and operations."""
+        self.fill_cart(size)
+        operations = [
+            {"product": product.pk, "quantity": 3, "op": "set"}
+            for product in self.products[:size]
+        ]
+        return lambda: self.client.post(
+            reverse("cart-batch"), {"operations": operations}, format="json"
+        )
+
+    def test_async_cart_views_match_sync_views(self):
+        """Ensure the async cart views apply changes and render carts like the sync ones."""
+        factory = RequestFactory(headers={"Authorization": "Token " + self.token.key})
+        operations = [{"product": self.product.pk, "quantity": 2, "op": "add"}]
+        response, content = call_async_view(
+            AsyncCartBatchAPIView.as_view(),
+            factory.post(
+                reverse("cart-batch"),
+                {"operations": operations},
+                content_type="application/json",
+            ),
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(content, self.client.get(self.cart_url).content)
+
+        response, content = call_async_view(
+            AsyncCartAPIView.as_view(), factory.get(self.cart_url)
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(content, self.client.get(self.cart_url).content)
+        self.assertEqual(json.loads(content)["total_quantity"], 2)
+
+        response, _ = call_async_view(
+            AsyncCartAPIView.as_view(), RequestFactory().get(self.cart_url)
+        )
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class CartConcurrencyTestCase(APITransactionTestCase):
+    threads = 8
+    requests_per_thread = 5
+
+    def setUp(self):
+        category = Category.objects.create(
+            name="Category 1",
+            image=get_temporary_image("category.jpg"),
+        )
+        subcategory = SubCategory.objects.create(
+            name="Subcategory 1",
+            category=category,
+            image=get_temporary_image("subcategory.jpg"),
+        )
+        self.product = Product.objects.create(
+            name="Product 1",
+            price=Decimal("100.00"),
+            slug="product-one",
+            subcategory=subcategory,
+            image=get_temporary_image("product1.jpg"),
+        )
+        self.user = User.objects.create_user(username="testuser", password="pass")
+        self.token = Token.objects.create(user=self.user)
+        cart_ids.clear()
+
+    def add_to_cart(self, _) -> list[int]:
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION="Token " + self.token.key)
+
+        try:
+            return [
+                client.post(
+                    reverse("cart"), {"product": self.product.pk, "quantity": 1}
+                ).status_code
+                for _ in range(self.requests_per_thread)
+            ]
+        finally:
+            connection.close()
+
+    def test_concurrent_additions_are_not_lost(self):
+        """Ensure concurrent additions of one product sum up in a single item."""
+        with ThreadPoolExecutor(self.threads) as pool:
+            statuses = sum(pool.map(self.add_to_cart, range(self.threads)), [])
+
+        expected = self.threads * self.requests_per_thread
+        cart = Cart.objects.get(user=self.user)
+        item = CartItem.objects.get(cart=cart)
+
+        self.assertEqual(set(statuses), {status.HTTP_201_CREATED})
+        self.assertEqual(item.quantity, expected)
+        self.assertEqual(cart.total_quantity, expected)
+        self.assertEqual(cart.total_price, expected * self.product.price)
+        self.assertEqual(cart.items_count, 1)
+
+    def test_sqlite_connections_are_tuned(self):
+        """Ensure new SQLite connections use the WAL journal and wait for locks."""
+        if connection.vendor != "sqlite":
+            self.skipTest("SQLite pragmas only.")
+
+        connection.close()
+
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode")
+            self.assertEqual(cursor.fetchone()[0], "wal")
+            cursor.execute("PRAGMA busy_timeout")
+            self.assertEqual(cursor.fetchone()[0], settings.SQLITE_PRAGMAS["busy_timeout"])
+
+
+class ProductImageQueueTestCase(APITransactionTestCase):
+    def setUp(self):
+        category = Category.objects.create(
+            name="Category 1",
+            image=get_temporary_image("category.jpg"),
+        )
+        self.subcategory = SubCategory.objects.create(
+            name="Subcategory 1",
+            category=category,
+            image=get_temporary_image("subcategory.jpg"),
+        )
+
+    def create_product(self, name: str) -> tuple[Product, list]:
+        """Creates a product with a new image, returning it and the enqueued futures."""
+        futures = []
+        enqueue = images.enqueue
+
+        def record(*args):
+            futures.append(enqueue(*args))
+            return futures[-1]
+
+        with mock.patch.object(images, "enqueue", record), transaction.atomic():
+            product = Product.objects.create(
+                name=name,
+                price=Decimal("10.00"),
+                slug=name.lower().replace(" ", "-"),
+                subcategory=self.subcategory,
+                image=get_temporary_image(f"{name}.jpg"),
+            )
+
+        return product, futures
+
+    def wait_for_images(self, product: Product, timeout: float = 30) -> Product:
+        """Waits until the render callback has stored the product's derivatives."""
+        deadline = time.monotonic() + timeout
+
+        while time.monotonic() < deadline:
+            product.refresh_from_db()
+
+            if product.image_status != ImageStatus.PENDING:
+                return product
+
+            time.sleep(0.05)
+
+        self.fail("Product images were not rendered in time.")
+
+    def test_images_are_rendered_after_commit(self):
+        """Ensure a committed image is rendered in the pool and stored by the callback."""
+        product, futures = self.create_product("Product 1")
+        self.assertEqual(len(futures), 1)
+
+        futures[0].result(timeout=30)
+        product = self.wait_for_images(product)
+
+        self.assertEqual(product.image_status, ImageStatus.READY)
+        self.assertRegex(product.image_small.name, r"_small\.[0-9a-f]{12}\.jpg$")
+
+    def test_broken_pool_is_replaced(self):
+        """Ensure images are still rendered after a pool worker died."""
+        dead_worker = images.get_executor().submit(os._exit, 1)
+        self.assertIsInstance(dead_worker.exception(timeout=30), BrokenProcessPool)
+
+        product, futures = self.create_product("Product 2")
+        self.assertIsNotNone(futures[0])
+
+        product = self.wait_for_images(product)
+        self.assertEqual(product.image_status, ImageStatus.READY)
+
+
+class ProductAPITestCase(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(
+            name="Category 1",
+            slug="category-one",
+            image=get_temporary_image("category.jpg"),
+        )
+        cls.subcategory = SubCategory.objects.create(
+            name="Subcategory 1",
+            slug="subcategory-one",
+            category=cls.category,
+            image=get_temporary_image("subcategory.jpg"),
+        )
+        cls.product = Product.objects.create(
+            name="Product 1",
+            price=Decimal("100.00"),
+            slug="product-one",
+            subcategory=cls.subcategory,
+            image=get_temporary_image("product1.jpg"),
+        )
+        cls.product_list_url = reverse("product-list")
+
+    def test_images_fall_back_to_original_until_ready(self):
+        """Check pending derivatives are served as the original image."""
+        response = self.client.get(self.product_list_url)
+        images = response.json()["results"][0]["images"]
+
+        self.assertEqual(self.product.image_status, ImageStatus.PENDING)
+        self.assertEqual(set(images.values()), {images["original"]})
+
+    def test_process_product_images_command(self):
+        """Check the command renders pending derivatives and marks them ready."""
+        call_command("process_product_images", stdout=io.StringIO())
+        self.product.refresh_from_db()
+
+        self.assertEqual(self.product.image_status, ImageStatus.READY)
+        self.assertRegex(
+            self.product.image_small.name,
+            r"^products/small/product1_small\.[0-9a-f]{12}\.jpg$",
+        )
+
+        response = self.client.get(self.product_list_url)
+        images = response.json()["results"][0]["images"]
+        self.assertEqual(images["small"], self.product.image_small.url)
+
+    def test_image_format_setting_is_case_insensitive(self):
+        """Check a lowercase output format still converts transparent sources."""
+        with (
+            tempfile.TemporaryDirectory() as directory,
+            override_settings(MEDIA_ROOT=directory, PRODUCT_IMAGE_FORMAT="jpeg"),
+        ):
+            source_path = os.path.join(directory, "transparent.png")
+            Image.new("RGBA", (64, 64)).save(source_path)
+
+            paths = images.render_derivatives(source_path, "transparent.png")
+
+            self.assertRegex(paths["small"], r"transparent_small\.[0-9a-f]{12}\.jpeg$")
+
+    def test_media_is_served_with_cache_headers(self):
+        """Check hashed media is immutable and supports revalidation and ranges."""
+        self.assertRegex(self.product.image.name, r"product1\.[0-9a-f]{12}\.jpg$")
+        url = self.product.image.url
+        content = self.product.image.read()
+
+        response = self.client.get(url)
+        self.assertEqual(b"".join(response.streaming_content), content)
+        self.assertEqual(response.headers["Cache-Control"], IMMUTABLE_CACHE_CONTROL)
+        self.assertEqual(response.headers["Content-Type"], "image/jpeg")
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response.headers["ETag"])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        response = self.client.get(url, HTTP_RANGE="bytes=10-19")
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(response.content, content[10:20])
+        self.assertEqual(response.headers["Content-Range"], f"bytes 10-19/{len(content)}")
+
+        response = self.client.get(url, HTTP_RANGE=f"bytes={len(content)}-")
+        self.assertEqual(
+            response.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE
+        )
+
+        response = self.client.get("/media/../core/settings.py")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_unreferenced_images_are_deleted(self):
+        """Check bulk deletes and the cleanup command remove orphaned files."""
+        product = Product.objects.create(
+            name="Deleted Product",
+            price=Decimal("5.00"),
+            slug="product-deleted",
+            subcategory=self.subcategory,
+            image=get_temporary_image("deleted.jpg"),
+        )
+        call_command("process_product_images", stdout=io.StringIO())
+        product.refresh_from_db()
+        storage = product.image_small.storage
+        names = [product.image.name, product.image_small.name]
+
+        orphan = storage.save("products/small/orphan.jpg", io.BytesIO(b"orphan"))
+        call_command("cleanup_product_images", min_age=0, stdout=io.StringIO())
+        self.assertFalse(storage.exists(orphan))
+        self.assertTrue(all(storage.exists(name) for name in names))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.filter(pk=product.pk).delete()
+
+        self.assertFalse(any(storage.exists(name) for name in names))
+        self.assertTrue(storage.exists(self.product.image.name))
+
+    def test_product_list_not_modified(self):
+        """Check a matching ETag is answered with 304 after two indexed queries."""
+        response = self.client.get(self.product_list_url)
+        self.assertIn("Last-Modified", response.headers)
+
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                self.product_list_url,
+                HTTP_IF_NONE_MATCH=response.headers["ETag"],
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_product_change_updates_etag(self):
+        """Check changing a product produces a new ETag."""
+        etag = self.client.get(self.product_list_url).headers["ETag"]
+        self.product.price = Decimal("120.00")
+        self.product.save()
+
+        response = self.client.get(self.product_list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response.headers["ETag"], etag)
+
+    def test_product_delete_updates_validators(self):
+        """Check deleting a product is not hidden by conditional requests."""
+        product = Product.objects.create(
+            name="Product 2",
+            price=Decimal("10.00"),
+            slug="product-two",
+            subcategory=self.subcategory,
+            image=self.product.image.name,
+        )
+        # Remaining rows keep a change time well before the deletion.
+        Product.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+        response = self.client.get(self.product_list_url)
+        etag, last_modified = response.headers["ETag"], response.headers["Last-Modified"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            product.delete()
+
+        response = self.client.get(self.product_list_url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["count"], 1)
+        self.assertGreater(
+            parse_http_date(response.headers["Last-Modified"]), parse_http_date(last_modified)
+        )
+
+        response = self.client.get(self.product_list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_product_payloads_follow_changes(self):
+        """Check stored payloads match the serializer and are rebuilt after changes."""
+        response = self.client.get(self.product_list_url)
+        self.product.refresh_from_db()
+
+        self.assertEqual(
+            response.json()["results"],
+            [ProductReadSerializer(self.product).data],
+        )
+        self.assertEqual(self.product.payload_updated_at, self.product.updated_at)
+
+        self.category.name = "Renamed"
+        self.category.save()
+
+        with self.assertNumQueries(6):
+            response = self.client.get(self.product_list_url)
+
+        self.assertEqual(response.json()["results"][0]["category"], "Renamed")
+
+        with self.assertNumQueries(4):
+            response = self.client.get(self.product_list_url)
+
+        self.assertEqual(response.json()["results"][0]["category"], "Renamed")
+
+    def test_large_product_list_is_streamed(self):
+        """Check large lists are streamed with the same body and headers."""
+        response = self.client.get(self.product_list_url)
+
+        with override_settings(STREAMING_THRESHOLD=1):
+            streamed_response = self.client.get(self.product_list_url)
+
+        self.assertFalse(response.streaming)
+        self.assertTrue(streamed_response.streaming)
+        self.assertEqual(b"".join(streamed_response.streaming_content), response.content)
+        self.assertEqual(streamed_response.headers["ETag"], response.headers["ETag"])
+        self.assertEqual(streamed_response.headers["Content-Type"], "application/json")
+
+    def test_renderer_falls_back_to_json_module(self):
+        """Check the stdlib encoder renders the same bytes as the fast one."""
+        data = {"name": "Product\u2028 ü", "price": Decimal("1.50"), "items": [1, None]}
+        renderer = JSONRenderer()
+
+        with mock.patch("api.renderers.orjson", None):
+            self.assertEqual(JSONRenderer().render(data), renderer.render(data))
+
+        self.assertEqual(
+            b"".join(renderer.stream([data, RawJSON("{}")], chunk_size=1)),
+            renderer.render([data, RawJSON("{}")]),
+        )
+
+    def test_product_list_keyset_pagination(self):
+        """Check cursor pages follow the requested ordering without a count."""
+        Product.objects.create(
+            name="Cheap Product",
+            price=Decimal("5.00"),
+            slug="product-cheap",
+            subcategory=self.subcategory,
+            image=get_temporary_image("product2.jpg"),
+        )
+        params = {"pagination": "cursor", "ordering": "price", "page_size": 1}
+
+        response = self.client.get(self.product_list_url, params)
+        self.assertNotIn("count", response.json())
+        self.assertEqual(response.json()["results"][0]["slug"], "product-cheap")
+
+        response = self.client.get(response.json()["next"])
+        self.assertEqual(response.json()["results"][0]["slug"], "product-one")
+        self.assertIsNone(response.json()["next"])
+
+    def test_product_list_keyset_pagination_ties(self):
+        """Check cursor pages walk past more than a thousand tied prices."""
+        Product.objects.bulk_create(
+            Product(
+                name=f"Tied Product {index}",
+                price=Decimal("100.00"),
+                slug=f"product-tied-{index}",
+                subcategory=self.subcategory,
+                image="products/original/product1.jpg",
+            )
+            for index in range(1300)
+        )
+        expected = list(
+            Product.objects.order_by("-price", "-id").values_list("slug", flat=True)
+        )
+        params = {"pagination": "cursor", "ordering": "-price", "page_size": 50}
+        response = self.client.get(self.product_list_url, params)
+        slugs = []
+
+        while True:
+            page = [product["slug"] for product in response.json()["results"]]
+            slugs += page
+
+            if response.json()["next"] is None:
+                break
+
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(response.json()["next"])
+
+            self.assertFalse(any("OFFSET" in query["sql"] for query in queries))
+
+        self.assertEqual(slugs, expected)
+
+        previous = self.client.get(response.json()["previous"]).json()
+        start = len(slugs) - len(page)
+        self.assertEqual(
+            [product["slug"] for product in previous["results"]], expected[start - 50 : start]
+        )
+
+    def test_product_list_filters(self):
+        """Check products are filtered by category, subcategory and price range."""
+        cases = (
+            ({"category": "category-one"}, ["product-one"]),
+            ({"subcategory": "subcategory-one"}, ["product-one"]),
+            ({"category": "unknown"}, []),
+            ({"min_price": "100", "max_price": "100.00"}, ["product-one"]),
+            ({"max_price": "99.99"}, []),
+        )
+
+        for params, slugs in cases:
+            with self.subTest(params=params):
+                response = self.client.get(self.product_list_url, params)
+                self.assertEqual(
+                    [product["slug"] for product in response.json()["results"]],
+                    slugs,
+                )
+
+    def test_product_list_invalid_price(self):
+        """Check an invalid price bound is rejected."""
+        for value in ("cheap", "NaN", "sNaN", "Infinity", "-inf"):
+            with self.subTest(value=value):
+                response = self.client.get(self.product_list_url, {"min_price": value})
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertIn("min_price", response.data)
+
+        for value in ("1e30", "1e999999", "0.0000001"):
+            with self.subTest(value=value):
+                response = self.client.get(self.product_list_url, {"max_price": value})
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_reserved_slugs(self):
+        """Check products can't take the slugs of the product list routes."""
+        routes = {
+            action.url_path for action in ProductViewSet.get_extra_actions() if not action.detail
+        }
+        self.assertEqual(routes, set(RESERVED_SLUGS))
+
+        for slug in RESERVED_SLUGS:
+            with self.subTest(slug=slug), self.assertRaises(ValidationError):
+                Product._meta.get_field("slug").clean(slug, None)
+
+    def test_product_retrieve_by_slug(self):
+        """Check a product is available by its slug."""
+        response = self.client.get(reverse("product-detail", args=("product-one",)))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["id"], self.product.pk)
+
+    def test_product_search(self):
+        """Check products are found by word prefixes and the index follows changes."""
+        cheap_product = Product.objects.create(
+            name="Cheap Product",
+            price=Decimal("5.00"),
+            slug="product-cheap",
+            subcategory=self.subcategory,
+            image=get_temporary_image("product2.jpg"),
+        )
+        search_url = reverse("product-search")
+
+        response = self.client.get(search_url, {"q": "prod"})
+        self.assertEqual(len(response.json()), 2)
+
+        response = self.client.get(search_url, {"q": "che PROD"})
+        self.assertEqual([product["slug"] for product in response.json()], ["product-cheap"])
+
+        cheap_product.delete()
+        response = self.client.get(search_url, {"q": "cheap"})
+        self.assertEqual(response.json(), [])
+
+    def test_product_search_requires_query(self):
+        """Check the search query is required."""
+        response = self.client.get(reverse("product-search"))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("q", response.data)
+
+    def test_catalog_export(self):
+        """Check the export streams JSON lines, CSV and gzip, optionally incrementally."""
+        export_url = reverse("product-export")
+        response = self.client.get(export_url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        token = Token.objects.create(user=User.objects.create_user(username="partner"))
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + token.key)
+
+        response = self.client.get(export_url)
+        rows = [json.loads(line) for line in response.getvalue().splitlines()]
+        self.assertTrue(response.streaming)
+        self.assertEqual(
+            [(row["slug"], row["category"], row["price"]) for row in rows],
+            [("product-one", "category-one", "100.00")],
+        )
+
+        response = self.client.get(export_url, {"export_format": "csv"})
+        rows = list(csv.DictReader(io.StringIO(response.getvalue().decode())))
+        self.assertEqual(response.headers["Content-Type"], "text/csv")
+        self.assertEqual([row["subcategory"] for row in rows], ["subcategory-one"])
+
+        response = self.client.get(export_url, {"export_format": "csv", "gzip": "true"})
+        self.assertIn('filename="catalog.csv.gz"', response.headers["Content-Disposition"])
+        self.assertEqual(
+            list(csv.DictReader(io.StringIO(gzip.decompress(response.getvalue()).decode()))),
+            rows,
+        )
+
+        response = self.client.get(export_url, {"since": self.product.updated_at})
+        self.assertEqual(len(response.getvalue().splitlines()), 1)
+
+        since = self.product.updated_at + timedelta(seconds=1)
+        response = self.client.get(export_url, {"since": since})
+        self.assertEqual(response.getvalue(), b"")
+
+    def test_export_catalog_command(self):
+        """Check the command writes a gzipped export that can be imported again."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "catalog.jsonl.gz"
+            call_command("export_catalog", path, gzip=True, stdout=io.StringIO())
+            rows = [json.loads(line) for line in gzip.decompress(path.read_bytes()).splitlines()]
+
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["image"], self.product.image.name)
+        self.assertEqual(rows[0]["subcategory"], self.subcategory.slug)
+
+    def test_import_products_command(self):
+        """Check the import updates products by slug and creates new ones."""
+        cart, _ = Cart.objects.get_or_create(user=User.objects.create_user(username="buyer"))
+        CartItem.objects.create(cart=cart, product=self.product, quantity=2)
+        Cart.objects.filter(pk=cart.pk).recalculate_totals()
+        rows = (
+            "slug,name,price,subcategory,image\n"
+            f"product-one,Renamed,90.50,{self.subcategory.slug},{self.product.image.name}\n"
+            f"product-new,New,10,{self.subcategory.slug},{self.product.image.name}\n"
+        )
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "products.csv"
+            path.write_text(rows)
+            call_command("import_products", path, workers=1, stdout=io.StringIO())
+
+        self.product.refresh_from_db()
+        new_product = Product.objects.get(slug="product-new")
+
+        self.assertEqual(self.product.name, "Renamed")
+        self.assertEqual(self.product.price, Decimal("90.50"))
+        self.assertEqual(new_product.subcategory, self.subcategory)
+        self.assertEqual(new_product.image_status, ImageStatus.READY)
+
+        cart.refresh_from_db()
+        self.assertEqual(cart.total_price, Decimal("181.00"))
+
+    def test_import_products_rejects_invalid_rows(self):
+        """Check invalid rows fail with their number and repeated slugs keep the last row."""
+        header = "slug,name,price,subcategory,image\n"
+        valid = f"product-new,New,10,{self.subcategory.slug},{self.product.image.name}\n"
+        cases = (
+            (f"product-new,New,abc,{self.subcategory.slug},x.jpg\n", "Row 2: invalid price"),
+            (f"product-new,New,123456789.00,{self.subcategory.slug},x.jpg\n", "Row 2: invalid price"),
+            (f"product-new,New,-1,{self.subcategory.slug},x.jpg\n", "Row 2: invalid price"),
+            (f"product new,New,10,{self.subcategory.slug},x.jpg\n", "Row 2: invalid slug"),
+            (f"search,New,10,{self.subcategory.slug},x.jpg\n", "Row 2: invalid slug"),
+            ("product-new,New\n", "Row 2: missing price, subcategory, image"),
+            ("product-new,New,10,unknown,x.jpg\n", "Row 2: unknown subcategory"),
+        )
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "products.csv"
+
+            for row, message in cases:
+                with self.subTest(row=row):
+                    path.write_text(header + valid + row)
+
+                    with self.assertRaisesMessage(CommandError, message):
+                        call_command("import_products", path, workers=1, stdout=io.StringIO())
+
+            self.assertFalse(Product.objects.filter(slug="product-new").exists())
+
+            path.write_text(header + valid + valid.replace(",New,10,", ",Newer,20,"))
+            call_command("import_products", path, skip_images=True, stdout=io.StringIO())
+
+        product = Product.objects.get(slug="product-new")
+        self.assertEqual((product.name, product.price), ("Newer", Decimal("20.00")))
+
+    def test_import_products_marks_broken_images(self):
+        """Check an image failing to render fails only its product."""
+        rows = (
+            "slug,name,price,subcategory,image\n"
+            f"product-new,New,10,{self.subcategory.slug},{self.product.image.name}\n"
+        )
+
+        command = "products.management.commands.import_products"
+
+        with (
+            tempfile.TemporaryDirectory() as directory,
+            mock.patch(
+                f"{command}.render_derivatives",
+                side_effect=Image.DecompressionBombError("Too large."),
+            ),
+            # Threads run the patched function, unlike worker processes.
+            mock.patch(f"{command}.ProcessPoolExecutor", ThreadPoolExecutor),
+        ):
+            path = Path(directory) / "products.csv"
+            path.write_text(rows)
+            call_command(
+                "import_products", path, workers=1, stdout=io.StringIO(), stderr=io.StringIO()
+            )
+
+        product = Product.objects.get(slug="product-new")
+        self.assertEqual(product.image_status, ImageStatus.FAILED)
+
+    def add_products(self, size: int) -> None:
+        """Adds products up to `size` in total, with stored payloads and indexed names."""
+        products = Product.objects.bulk_create(
+            Product(
+                name=f"Bulk Product {index}",
+                price=Decimal("10.00"),
+                slug=f"bulk-product-{index}",
+                subcategory=self.subcategory,
+                image=self.product.image.name,
+            )
+            for index in range(Product.objects.count(), size)
+        )
+        refresh_payloads(Product.objects.values_list("pk", flat=True))
+        search.index_products(products)
+
+    @query_budget(queries=4, memory=256 * 1024)
+    def test_product_list_budget(self, size):
+        """Check the first list page costs the same for catalogs of any size."""
+        self.add_products(size)
+        return lambda: self.client.get(self.product_list_url)
+
+    @query_budget(queries=3, memory=512 * 1024)
+    def test_product_list_keyset_budget(self, size):
+        """Check a full cursor page costs the same queries for any page size."""
+        self.add_products(size)
+        params = {"pagination": "cursor", "page_size": 100}
+        return lambda: self.client.get(self.product_list_url, params)
+
+    @query_budget(queries=1, memory=128 * 1024)
+    def test_product_retrieve_budget(self, size):
+        """Check a product costs the same for catalogs of any size."""
+        self.add_products(size)
+        return lambda: self.client.get(reverse("product-detail", args=("product-one",)))
+
+    @query_budget(queries=2, memory=256 * 1024)
+    def test_product_search_budget(self, size):
+        """Check the search costs the same for any number of matches."""
+        self.add_products(size)
+        return lambda: self.client.get(reverse("product-search"), {"q": "product"})
+
+    @query_budget(queries=1, memory=256 * 1024)
+    def test_catalog_export_budget(self, size):
+        """Check the export streams catalogs of any size with the same queries."""
+        self.add_products(size)
+        token, _ = Token.objects.get_or_create(
+            user=User.objects.get_or_create(username="partner")[0]
+        )
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + token.key)
+
+        # A token cache miss costs an extra query.
+        b"".join(self.client.get(reverse("product-export")).streaming_content)
+        return lambda: self.client.get(reverse("product-export"))
+
+    def test_async_product_views_match_sync_views(self):
+        """Check the async product views return the same responses as the sync ones."""
+        self.add_products(150)
+        factory = RequestFactory()
+        product_list = AsyncProductViewSet.as_view({"get": "list"})
+        product_detail = AsyncProductViewSet.as_view({"get": "retrieve"})
+
+        for params in ({}, {"page": 2}, {"pagination": "cursor", "page_size": 100}):
+            with self.subTest(params=params):
+                expected = self.client.get(self.product_list_url, params)
+                response, content = call_async_view(
+                    product_list, factory.get(self.product_list_url, params)
+                )
+                sync_content = (
+                    b"".join(expected.streaming_content)
+                    if expected.streaming
+                    else expected.content
+                )
+                self.assertEqual(response.streaming, expected.streaming)
+                self.assertEqual(content, sync_content)
+
+        url = reverse("product-detail", args=(self.product.slug,))
+        response, content = call_async_view(
+            product_detail, factory.get(url), slug=self.product.slug
+        )
+        self.assertEqual(content, self.client.get(url).content)
+
+        response, _ = call_async_view(
+            product_detail, factory.get(url), slug="missing"
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        response, _ = call_async_view(
+            product_list, factory.get(self.product_list_url, {"page": 100})
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class CategoryAPITestCase(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(
+            name="Category 1",
+            slug="category-one",
+            image=get_temporary_image("category.jpg"),
+        )
+        cls.category_list_url = reverse("category-list")
+
+    def setUp(self):
+        cache.clear()
+
+    def test_tests_use_their_own_cache(self):
+        """Ensure clearing the cache in tests never touches a server's cache."""
+        self.assertEqual(settings.CACHES, settings.TEST_CACHES)
+        self.assertIsInstance(caches["default"], LocMemCache)
+
+    def test_category_list_is_cached(self):
+        """Ensure a repeated category list request is served without queries."""
+        response = self.client.get(self.category_list_url)
+
+        with self.assertNumQueries(0):
+            cached_response = self.client.get(self.category_list_url)
+
+        self.assertEqual(cached_response.data, response.data)
+
+    def test_category_list_matches_drf_representation(self):
+        """Ensure the compiled representation renders the same bytes as DRF."""
+        SubCategory.objects.create(
+            name="Subcategory 1",
+            slug="subcategory-one",
+            category=self.category,
+            image=get_temporary_image("subcategory.jpg"),
+        )
+        content = self.client.get(self.category_list_url).content
+        cache.clear()
+
+        with mock.patch.object(
+            ReadOnlyModelSerializer,
+            "to_representation",
+            serializers.ModelSerializer.to_representation,
+        ):
+            self.assertEqual(self.client.get(self.category_list_url).content, content)
+
+    def test_category_list_not_modified(self):
+        """Ensure a matching ETag is answered with 304 without queries."""
+        etag = self.client.get(self.category_list_url).headers["ETag"]
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.category_list_url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_category_change_invalidates_cache(self):
+        """Ensure saving a subcategory makes the category list fresh again."""
+        self.client.get(self.category_list_url)
+        SubCategory.objects.create(
+            name="Subcategory 1",
+            slug="subcategory-one",
+            category=self.category,
+            image=get_temporary_image("subcategory.jpg"),
+        )
+
+        response = self.client.get(self.category_list_url)
+        subcategories = response.data["results"][0]["subcategories"]
+        self.assertEqual([item["slug"] for item in subcategories], ["subcategory-one"])
+
+    def test_category_list_is_instrumented(self):
+        """Ensure list timings are sent in Server-Timing and exported as metrics."""
+        metrics.clear()
+        response = self.client.get(self.category_list_url)
+
+        self.assertRegex(
+            response.headers["Server-Timing"],
+            r'^db;dur=[\d.]+;desc="\d+ queries", serialize;dur=[\d.]+, total;dur=[\d.]+$',
+        )
+
+        with override_settings(INTERNAL_IPS=["127.0.0.1"]):
+            response = self.client.get(reverse("metrics"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        content = response.content.decode()
+        self.assertIn('api_requests_total{route="category-list"} 1\n', content)
+        self.assertIn('api_cache_misses_total{cache="catalog"}', content)
+
+    def test_metrics_access(self):
+        """Ensure metrics are only served to internal addresses and with the token."""
+        url = reverse("metrics")
+
+        for internal_ips, token, authorization, expected_status in (
+            ([], "", "", status.HTTP_404_NOT_FOUND),
+            ([], "", "Bearer ", status.HTTP_404_NOT_FOUND),
+            (["127.0.0.1"], "", "", status.HTTP_200_OK),
+            ([], "secret", "Bearer wrong", status.HTTP_404_NOT_FOUND),
+            ([], "secret", "Bearer secret", status.HTTP_200_OK),
+        ):
+            with (
+                self.subTest(internal_ips=internal_ips, authorization=authorization),
+                override_settings(INTERNAL_IPS=internal_ips, METRICS_TOKEN=token),
+            ):
+                response = self.client.get(url, HTTP_AUTHORIZATION=authorization)
+                self.assertEqual(response.status_code, expected_status)
+
+    def test_repeated_queries_are_logged(self):
+        """Ensure a request repeating an SQL shape is logged as N+1 queries."""
+
+        def get_response(request):
+            for category_id in (1, 2, 3):
+                Category.objects.filter(pk=category_id).exists()
+
+            request.resolver_match = resolve(self.category_list_url)
+            return HttpResponse()
+
+        middleware = InstrumentationMiddleware(get_response)
+
+        with (
+            override_settings(N_PLUS_ONE_THRESHOLD=3),
+            self.assertLogs("api.middleware", "WARNING") as logs,
+        ):
+            middleware(RequestFactory().get(self.category_list_url))
+
+        self.assertIn("3 executions", logs.output[0])
+
+    @query_budget(queries=5, memory=512 * 1024)
+    def test_category_list_budget(self, size):
+        """Ensure an uncached category list costs the same for any number of subcategories."""
+        SubCategory.objects.bulk_create(
+            SubCategory(
+                name=f"Subcategory {index}",
+                slug=f"subcategory-{index}",
+                category=self.category,
+                image=self.category.image.name,
+            )
+            for index in range(SubCategory.objects.count(), size)
+        )
+        cache.clear()
+        return lambda: self.client.get(self.category_list_url)
+
+    def test_async_category_list_matches_sync_list(self):
+        """Ensure the async category list is served like the sync one, from the cache."""
+        content = self.client.get(self.category_list_url).content
+        category_list = AsyncCategoryViewSet.as_view({"get": "list"})
+        request = RequestFactory().get(self.category_list_url)
+
+        with self.assertNumQueries(0):
+            response, cached_content = call_async_view(category_list, request)
+
+        self.assertEqual(cached_content, content)
+        cache.clear()
+
+        response, fresh_content = call_async_view(category_list, request)
+        self.assertEqual(fresh_content, content)
+
+        request = RequestFactory().get(
+            self.category_list_url, headers={"If-None-Match": response.headers["ETag"]}
+        )
+        response, _ = call_async_view(category_list, request)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
@@ -1,22 +1,88 @@
+from collections.abc import Callable
+from functools import cached_property
+
+from django.db import transaction
 from django.http import HttpRequest, HttpResponse
 from rest_framework import permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.shortcuts import get_object_or_404
 from drf_spectacular.utils import extend_schema
+from api.cache import cart_ids
+from api.constants import CartOperation
+from api.views.mixins import AsyncAPIViewMixin, InstrumentedViewMixin
 from cart.models import Cart, CartItem
-from api.serializers.cart import CartReadSerializer, CartItemWriteSerializer
+from products.models import Product
+from api.serializers.cart import (
+    CartBatchSerializer,
+    CartReadSerializer,
+    CartItemWriteSerializer,
+    aprefetch_cart_items,
+    prefetch_cart_items,
+)
 
 
-class CartAPIView(APIView):
-    """API view for retrieving, adding to, and clearing the user's cart."""
+class BaseCartAPIView(InstrumentedViewMixin, APIView):
+    """
+    Base view for the user's cart.
+
+    Item changes address rows by the cart id, which is cached per process for
+    a short time, so the cart row itself is only loaded to render it. The user is
+    only referenced by id, so stateless JWT users work as well.
+    """
 
     permission_classes = (permissions.IsAuthenticated,)
 
+    @cached_property
+    def cart_id(self) -> int:
+        """Returns the id of the authenticated user's cart."""
+        user = self.request.user
+        cart_id = cart_ids.get(user.pk)
+
+        if cart_id is None:
+            cart, _ = Cart.objects.get_or_create(user_id=user.pk)
+            cart_id = cart.pk
+            cart_ids.set(user.pk, cart_id)
+
+        return cart_id
+
     def _get_cart(self) -> Cart:
-        """Retrieves the cart for the authenticated user, creating one if it doesn't exist."""
-        cart, _ = Cart.objects.get_or_create(user=self.request.user)
-        return cart
+        """Retrieves the user's cart with its items, ready to be serialized."""
+        user = self.request.user
+
+        try:
+            cart = Cart.objects.get(pk=self.cart_id, user_id=user.pk)
+        except Cart.DoesNotExist:
+            cart_ids.delete(user.pk)
+            cart, _ = Cart.objects.get_or_create(user_id=user.pk)
+
+        return prefetch_cart_items(cart)
+
+    def _get_carts(self):
+        """Returns a queryset of the user's cart for bulk updates."""
+        return Cart.objects.filter(pk=self.cart_id, user_id=self.request.user.pk)
+
+    def _change_cart(self, change: Callable[[], None]) -> None:
+        """
+        Runs the change in a transaction, and once more with a fresh cart id if
+        the cached one no longer exists, e.g. when another process deleted it.
+
+        Changes raise `Cart.DoesNotExist` when no cart row matches the id.
+        """
+        try:
+            with transaction.atomic():
+                change()
+                return
+        except Cart.DoesNotExist:
+            cart_ids.delete(self.request.user.pk)
+            self.__dict__.pop("cart_id", None)
+
+        with transaction.atomic():
+            change()
+
+
+class CartAPIView(BaseCartAPIView):
+    """API view for retrieving, adding to, and clearing the user's cart."""
 
     @extend_schema(
         summary="Get shopping cart items",
@@ -24,8 +90,7 @@ class CartAPIView(APIView):
     )
     def get(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
         """Retrieves the authenticated user's cart with items, total quantity, and total price."""
-        cart = self._get_cart()
-        serializer = CartReadSerializer(cart, context={"request": request})
+        serializer = CartReadSerializer(self._get_cart(), context={"request": request})
         return Response(serializer.data)
 
     @extend_schema(
@@ -35,26 +100,18 @@ class CartAPIView(APIView):
     )
     def post(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
         """Adds a product to the cart or updates the quantity if it already exists."""
-        cart = self._get_cart()
-        serializer = CartItemWriteSerializer(data=request.data, context={"cart": cart})
+        serializer = CartItemWriteSerializer(data=request.data)
 
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-        cart_item, created = CartItem.objects.select_for_update().get_or_create(
-            cart=cart,
-            product=serializer.validated_data["product"],
-        )
-
-        if created:
-            cart_item.quantity = serializer.validated_data["quantity"]
-        else:
-            cart_item.quantity += serializer.validated_data["quantity"]
+        product = serializer.validated_data["product"]
+        quantity = serializer.validated_data["quantity"]
 
-        cart_item.save()
+        self._change_cart(lambda: self._add_item(product, quantity))
 
         return Response(
-            CartReadSerializer(cart, context={"request": request}).data,
+            CartReadSerializer(self._get_cart(), context={"request": request}).data,
             status=status.HTTP_201_CREATED,
         )
 
@@ -64,17 +121,34 @@ class CartAPIView(APIView):
     )
     def delete(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
         """Clears all items from the authenticated user's cart."""
-        cart = self._get_cart()
-        cart.cart_items.all().delete()
+        self._change_cart(self._clear_items)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    def _add_item(self, product: Product, quantity: int) -> None:
+        """Adds quantity of the product and updates the totals to match."""
+        created = CartItem.objects.add_quantity(self.cart_id, product, quantity)
 
-class CartItemAPIView(APIView):
-    permission_classes = (permissions.IsAuthenticated,)
+        if not self._get_carts().shift_totals(
+            quantity, quantity * product.price, items=int(created)
+        ):
+            raise Cart.DoesNotExist
 
-    def _get_cart(self) -> Cart:
-        cart, _ = Cart.objects.get_or_create(user=self.request.user)
-        return cart
+    def _clear_items(self) -> None:
+        """Removes all items and zeroes the totals."""
+        if not self._get_carts().reset_totals():
+            raise Cart.DoesNotExist
+
+        CartItem.objects.filter(cart_id=self.cart_id).delete()
+
+
+class CartItemAPIView(BaseCartAPIView):
+    def _get_locked_item(self, pk: int | None) -> CartItem:
+        """Retrieves the cart item with its product, locked until the transaction ends."""
+        return get_object_or_404(
+            CartItem.objects.select_related("product").select_for_update(of=("self",)),
+            pk=pk,
+            cart_id=self.cart_id,
+        )
 
     @extend_schema(
         summary="Update quantity of the item",
@@ -88,22 +162,28 @@ class CartItemAPIView(APIView):
         *args,
         **kwargs,
     ) -> HttpResponse:
-        cart = self._get_cart()
-        cart_item = get_object_or_404(CartItem, pk=pk, cart=cart)
-
-        serializer = CartItemWriteSerializer(
-            cart_item,
-            data=request.data,
-            partial=False,
-            context={"cart": cart},
-        )
+        with transaction.atomic():
+            cart_item = self._get_locked_item(pk)
 
-        if not serializer.is_valid():
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+            serializer = CartItemWriteSerializer(
+                cart_item,
+                data=request.data,
+                partial=False,
+            )
 
-        cart_item.quantity = serializer.validated_data["quantity"]
-        cart_item.save()
-        return Response(CartReadSerializer(cart, context={"request": request}).data)
+            if not serializer.is_valid():
+                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+            quantity_change = serializer.validated_data["quantity"] - cart_item.quantity
+            cart_item.quantity = serializer.validated_data["quantity"]
+            cart_item.save()
+            self._get_carts().shift_totals(
+                quantity_change, quantity_change * cart_item.product.price
+            )
+
+        return Response(
+            CartReadSerializer(self._get_cart(), context={"request": request}).data
+        )
 
     @extend_schema(
         summary="Remove item from the cart",
@@ -111,7 +191,128 @@ class CartItemAPIView(APIView):
     )
     def delete(self, request, pk=None, *args, **kwargs) -> HttpResponse:
         """Deletes a specific item from the authenticated user's cart."""
-        cart = self._get_cart()
-        cart_item = get_object_or_404(CartItem, pk=pk, cart=cart)
-        cart_item.delete()
+        with transaction.atomic():
+            cart_item = self._get_locked_item(pk)
+            cart_item.delete()
+            self._get_carts().shift_totals(
+                -cart_item.quantity,
+                -cart_item.quantity * cart_item.product.price,
+                items=-1,
+            )
+
         return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class CartBatchAPIView(BaseCartAPIView):
+    """API view for applying several cart changes in one request."""
+
+    @extend_schema(
+        summary="Change several cart items",
+        description=(
+            "Applies a list of `add`, `set` and `remove` operations in order, "
+            "in a single transaction, and returns the resulting cart."
+        ),
+        request=CartBatchSerializer,
+        responses=CartReadSerializer,
+    )
+    def post(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        """Applies the operations to the authenticated user's cart."""
+        serializer = CartBatchSerializer(data=request.data)
+
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        self._change_cart(
+            lambda: self._apply_operations(serializer.validated_data["operations"])
+        )
+
+        return Response(
+            CartReadSerializer(self._get_cart(), context={"request": request}).data
+        )
+
+    def _apply_operations(self, operations: list[dict]) -> None:
+        """Applies the operations in order and recalculates the totals."""
+        # Locking the cart row serializes batches of the same cart.
+        self._get_carts().select_for_update().values_list("pk").get()
+        quantities = dict(
+            CartItem.objects.filter(
+                cart_id=self.cart_id,
+                product__in={operation["product"] for operation in operations},
+            ).values_list("product", "quantity")
+        )
+
+        for operation in operations:
+            product = operation["product"]
+
+            if operation["op"] == CartOperation.ADD:
+                quantities[product] = quantities.get(product, 0)
+                quantities[product] += operation["quantity"]
+            elif operation["op"] == CartOperation.SET:
+                quantities[product] = operation["quantity"]
+            else:
+                quantities[product] = 0
+
+        removed = [product for product, quantity in quantities.items() if not quantity]
+
+        CartItem.objects.bulk_create(
+            (
+                CartItem(cart_id=self.cart_id, product_id=product, quantity=quantity)
+                for product, quantity in quantities.items()
+                if quantity
+            ),
+            update_conflicts=True,
+            unique_fields=("cart", "product"),
+            update_fields=("quantity",),
+        )
+        CartItem.objects.filter(cart_id=self.cart_id, product__in=removed).delete()
+        self._get_carts().recalculate_totals()
+
+
+class AsyncCartMixin(AsyncAPIViewMixin):
+    """
+    Dispatches cart views asynchronously, for ASGI servers.
+
+    The cart is read with the async ORM. Changes stay synchronous, since they
+    need a transaction, and each runs in a worker thread as a whole.
+    """
+
+    async def aget_cart_id(self) -> int:
+        """Asynchronous version of `cart_id`, which it fills for synchronous code."""
+        if "cart_id" not in self.__dict__:
+            user = self.request.user
+            cart_id = cart_ids.get(user.pk)
+
+            if cart_id is None:
+                cart, _ = await Cart.objects.aget_or_create(user_id=user.pk)
+                cart_id = cart.pk
+                cart_ids.set(user.pk, cart_id)
+
+            self.cart_id = cart_id
+
+        return self.cart_id
+
+    async def _aget_cart(self) -> Cart:
+        """Asynchronous version of `_get_cart`."""
+        user = self.request.user
+
+        try:
+            cart = await Cart.objects.aget(pk=await self.aget_cart_id(), user_id=user.pk)
+        except Cart.DoesNotExist:
+            cart_ids.delete(user.pk)
+            cart, _ = await Cart.objects.aget_or_create(user_id=user.pk)
+
+        return await aprefetch_cart_items(cart)
+
+
+class AsyncCartAPIView(AsyncCartMixin, CartAPIView):
+    async def get(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        serializer = CartReadSerializer(await self._aget_cart(), context={"request": request})
+        return Response(serializer.data)
+
+
+class AsyncCartItemAPIView(AsyncCartMixin, CartItemAPIView):
+    pass
+
+
+class AsyncCartBatchAPIView(AsyncCartMixin, CartBatchAPIView):
+    pass
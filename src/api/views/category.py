@@ -1,7 +1,16 @@
+from django.http import HttpRequest, HttpResponse
 from drf_spectacular.utils import extend_schema_view, extend_schema
 from rest_framework import viewsets
 
+from api.cache import catalog_cache
 from api.serializers.category import CategoryReadSerializer
+from api.views.mixins import (
+    AsyncAPIViewMixin,
+    CachedListMixin,
+    ConditionalListMixin,
+    InstrumentedViewMixin,
+    ListModelMixin,
+)
 from categories.models import Category
 
 
@@ -11,8 +20,46 @@ from categories.models import Category
         description="Returns a list of all categories with their subcategories.",
     ),
 )
-class CategoryViewSet(viewsets.mixins.ListModelMixin, viewsets.GenericViewSet):
+class CategoryViewSet(
+    InstrumentedViewMixin,
+    ConditionalListMixin,
+    CachedListMixin,
+    ListModelMixin,
+    viewsets.GenericViewSet,
+):
     """API endpoint that allows categories to be viewed."""
 
     queryset = Category.objects.all().prefetch_related("subcategories")
     serializer_class = CategoryReadSerializer
+
+    def get_list_state(self) -> dict:
+        """Returns the list state, cached until the catalog version changes."""
+        state = catalog_cache.get("list-state")
+
+        if state is None:
+            state = super().get_list_state()
+            catalog_cache.set("list-state", state)
+
+        return state
+
+    async def aget_list_state(self) -> dict:
+        """Asynchronous version of `get_list_state`, the cache itself is not awaited."""
+        state = catalog_cache.get("list-state")
+
+        if state is None:
+            state = await super().aget_list_state()
+            catalog_cache.set("list-state", state)
+
+        return state
+
+
+class AsyncCategoryViewSet(AsyncAPIViewMixin, CategoryViewSet):
+    """
+    Category endpoint for ASGI servers.
+
+    Cached list states and pages are served without leaving the event loop;
+    misses are loaded with the async ORM.
+    """
+
+    async def list(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        return await self.alist(request, *args, **kwargs)
@@ -0,0 +1,119 @@
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpRequest, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.http import require_safe
+
+from products.images import is_hashed
+
+BYTE_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "public, no-cache"
+
+
+class RangeNotSatisfiable(Exception):
+    """Raised for a byte range outside of the file."""
+
+
+def parse_range(header: str, size: int) -> tuple[int, int] | None:
+    """
+    Returns the first and last byte of a single range request.
+
+    Multiple or malformed ranges return None, so the whole file is served.
+    """
+    match = BYTE_RANGE.match(header.strip())
+
+    if match is None or match.groups() == ("", ""):
+        return None
+
+    first, last = match.groups()
+
+    if not first:
+        first, last = max(size - int(last), 0), size - 1
+    else:
+        first, last = int(first), min(int(last), size - 1) if last else size - 1
+
+    if first > last or first >= size:
+        raise RangeNotSatisfiable
+
+    return first, last
+
+
+def get_range_response(request: HttpRequest, path: str, size: int, etag: str):
+    """Returns a 206 or 416 response for a `Range` request, or None."""
+    header = request.headers.get("Range")
+
+    if not header or request.headers.get("If-Range", etag) != etag:
+        return None
+
+    try:
+        byte_range = parse_range(header, size)
+    except RangeNotSatisfiable:
+        response = HttpResponse(status=416)
+        response.headers["Content-Range"] = f"bytes */{size}"
+        return response
+
+    if byte_range is None:
+        return None
+
+    first, last = byte_range
+
+    with open(path, "rb") as file:
+        file.seek(first)
+        content = file.read(last - first + 1)
+
+    response = HttpResponse(
+        content,
+        status=206,
+        content_type=mimetypes.guess_type(path)[0] or "application/octet-stream",
+    )
+    response.headers["Content-Range"] = f"bytes {first}-{last}/{size}"
+    return response
+
+
+@require_safe
+def serve_media(request: HttpRequest, path: str) -> HttpResponse:
+    """
+    Serves a media file with caching headers.
+
+    Content-hashed names never change their content, so they are cached for a
+    year as immutable; other files are revalidated with `ETag` and
+    `Last-Modified`. A single byte range is answered with 206.
+    """
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404
+
+    if not os.path.isfile(full_path):
+        raise Http404
+
+    stat = os.stat(full_path)
+    etag = quote_etag(f"{stat.st_mtime_ns:x}-{stat.st_size:x}")
+    last_modified = int(stat.st_mtime)
+
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=last_modified,
+    )
+
+    if response is None:
+        response = get_range_response(request, full_path, stat.st_size, etag)
+
+    if response is None:
+        response = FileResponse(open(full_path, "rb"))
+
+    response.headers["ETag"] = etag
+    response.headers["Last-Modified"] = http_date(last_modified)
+    response.headers["Accept-Ranges"] = "bytes"
+    response.headers["Cache-Control"] = (
+        IMMUTABLE_CACHE_CONTROL if is_hashed(path) else REVALIDATE_CACHE_CONTROL
+    )
+    return response
@@ -0,0 +1,33 @@
+import hmac
+
+from django.conf import settings
+from django.http import Http404, HttpRequest, HttpResponse
+from django.views.decorators.http import require_safe
+
+from api.metrics import metrics
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def is_allowed(request: HttpRequest) -> bool:
+    """Returns whether the request may read the metrics."""
+    if settings.METRICS_TOKEN and hmac.compare_digest(
+        request.headers.get("Authorization", ""), f"Bearer {settings.METRICS_TOKEN}"
+    ):
+        return True
+
+    return request.META.get("REMOTE_ADDR") in settings.INTERNAL_IPS or request.user.is_staff
+
+
+@require_safe
+def serve_metrics(request: HttpRequest) -> HttpResponse:
+    """
+    Serves the API metrics of this process in the Prometheus text format.
+
+    Only requests with the `METRICS_TOKEN` bearer token, addresses listed in
+    `INTERNAL_IPS` and staff users may read them, other clients get 404.
+    """
+    if not is_allowed(request):
+        raise Http404
+
+    return HttpResponse(metrics.render(), content_type=CONTENT_TYPE)
@@ -0,0 +1,457 @@
+import hashlib
+import time
+from collections.abc import AsyncIterator, Iterable
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.paginator import InvalidPage, Page
+from django.db.models import Max, Model, QuerySet
+from django.http import Http404, HttpRequest, HttpResponse, StreamingHttpResponse
+from django.shortcuts import aget_object_or_404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework import exceptions, mixins
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from api.cache import catalog_cache
+from api.renderers import JSONRenderer, RawJSON
+
+
+async def aiterate(items: Iterable) -> AsyncIterator:
+    """Yields the items of an iterable that does no I/O, without a worker thread."""
+    for item in items:
+        yield item
+
+
+async def iterate_in_thread(items: Iterable) -> AsyncIterator:
+    """Yields the items of a blocking iterable, advancing it in a worker thread."""
+    iterator, done = iter(items), object()
+    get_next = sync_to_async(next)
+
+    while (item := await get_next(iterator, done)) is not done:
+        yield item
+
+
+class ConditionalListMixin:
+    """
+    Adds `ETag` and `Last-Modified` headers to list responses.
+
+    Both are derived from the row count and the latest `updated_at` of the
+    listed rows, and the latter from the time of the last catalog deletion
+    too, so `If-None-Match` and `If-Modified-Since` requests are answered
+    with 304 without serializing rows. Changes of related rows are expected
+    to touch `updated_at` of the rows that embed them. The state is kept as
+    `list_state` for the rest of the request.
+    """
+
+    def get_list_state(self) -> dict:
+        """Returns the row count and the last change time of the listed data."""
+        queryset = self.filter_queryset(self.get_queryset()).order_by()
+
+        return {
+            "count": queryset.count(),
+            "updated_at": queryset.aggregate(updated_at=Max("updated_at"))["updated_at"],
+        }
+
+    async def aget_list_state(self) -> dict:
+        """Asynchronous version of `get_list_state`."""
+        queryset = self.filter_queryset(self.get_queryset()).order_by()
+        aggregate = await queryset.aaggregate(updated_at=Max("updated_at"))
+
+        return {"count": await queryset.acount(), "updated_at": aggregate["updated_at"]}
+
+    def get_validators(self, request: HttpRequest, state: dict) -> tuple[str, int | None]:
+        """Returns the ETag and the Last-Modified timestamp of the list state."""
+        etag = quote_etag(
+            hashlib.md5(
+                f"{request.build_absolute_uri()}:{sorted(state.items())}".encode(),
+                usedforsecurity=False,
+            ).hexdigest()
+        )
+        changes = [
+            changed for changed in (state["updated_at"], catalog_cache.deleted_at) if changed
+        ]
+        last_modified = int(max(changes).timestamp()) if changes else None
+
+        return etag, last_modified
+
+    def get_conditional_list(
+        self, request: HttpRequest, state: dict
+    ) -> tuple[tuple[str, int | None], HttpResponse | None]:
+        """
+        Returns the validators of the list state and the response they answer
+        the request with, e.g. 304, or None if the list has to be served.
+        """
+        self.list_state = state
+        etag, last_modified = self.get_validators(request, state)
+        response = get_conditional_response(
+            request,
+            etag=etag,
+            last_modified=last_modified,
+        )
+
+        return (etag, last_modified), response
+
+    def set_validators(
+        self, response: HttpResponse, etag: str, last_modified: int | None
+    ) -> HttpResponse:
+        response.headers["ETag"] = etag
+
+        if last_modified:
+            response.headers["Last-Modified"] = http_date(last_modified)
+
+        return response
+
+    def list(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        validators, response = self.get_conditional_list(request, self.get_list_state())
+
+        if response is None:
+            response = super().list(request, *args, **kwargs)
+
+        return self.set_validators(response, *validators)
+
+    async def alist(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        """Asynchronous version of `list`."""
+        validators, response = self.get_conditional_list(
+            request, await self.aget_list_state()
+        )
+
+        if response is None:
+            response = await super().alist(request, *args, **kwargs)
+
+        return self.set_validators(response, *validators)
+
+
+class CachedListMixin:
+    """Serves list pages from the catalog cache, filling it on a miss."""
+
+    def list(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        data = catalog_cache.get(request.build_absolute_uri())
+
+        if data is None:
+            data = super().list(request, *args, **kwargs).data
+            catalog_cache.set(request.build_absolute_uri(), data)
+
+        return Response(data)
+
+    async def alist(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        """Asynchronous version of `list`, the cache itself is not awaited."""
+        data = catalog_cache.get(request.build_absolute_uri())
+
+        if data is None:
+            data = (await super().alist(request, *args, **kwargs)).data
+            catalog_cache.set(request.build_absolute_uri(), data)
+
+        return Response(data)
+
+
+class ListModelMixin(mixins.ListModelMixin):
+    """DRF's list action, with an asynchronous version for async views."""
+
+    async def alist(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        """Asynchronous version of `list`, loading the rows with the async ORM."""
+        queryset = self.filter_queryset(self.get_queryset())
+        page = await self.apaginate_queryset(queryset)
+
+        if page is None:
+            return Response(
+                self.get_serializer([obj async for obj in queryset], many=True).data
+            )
+
+        return self.get_paginated_response(self.get_serializer(page, many=True).data)
+
+
+class StoredPayloadMixin:
+    """
+    Serves list and detail responses from stored JSON payloads of the rows.
+
+    Views implement `get_payloads`, returning `RawJSON` fragments of the given
+    rows in order, so rows are not passed through the serializer per request,
+    and `aget_payloads` to serve async views.
+    """
+
+    def get_payloads(self, objects) -> list[RawJSON]:
+        raise NotImplementedError
+
+    async def aget_payloads(self, objects) -> list[RawJSON]:
+        raise NotImplementedError
+
+    def list(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+
+        if page is None:
+            return Response(self.get_payloads(queryset))
+
+        return self.get_paginated_response(self.get_payloads(page))
+
+    async def alist(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        """Asynchronous version of `list`."""
+        queryset = self.filter_queryset(self.get_queryset())
+        page = await self.apaginate_queryset(queryset)
+
+        if page is None:
+            return Response(await self.aget_payloads(queryset))
+
+        return self.get_paginated_response(await self.aget_payloads(page))
+
+    def retrieve(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        return Response(self.get_payloads([self.get_object()])[0])
+
+    async def aretrieve(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        """Asynchronous version of `retrieve`."""
+        (payload,) = await self.aget_payloads([await self.aget_object()])
+        return Response(payload)
+
+
+class StreamingListMixin:
+    """
+    Streams large list responses chunk by chunk.
+
+    Successful lists of at least `STREAMING_THRESHOLD` rows are encoded by the
+    renderer's `stream` method into a `StreamingHttpResponse`, so the body is
+    never held in memory as a whole and its first bytes are sent early. Async
+    views get an async iterator, which ASGI servers consume without threads.
+    """
+
+    def should_stream(self, response: Response) -> bool:
+        """Checks whether the response is a list large enough to be streamed."""
+        data = response.data
+
+        if isinstance(data, dict):
+            data = data.get("results")
+
+        return (
+            response.status_code == 200
+            and hasattr(response.accepted_renderer, "stream")
+            and isinstance(data, list)
+            and len(data) >= settings.STREAMING_THRESHOLD
+        )
+
+    def finalize_response(
+        self, request: HttpRequest, response: HttpResponse, *args, **kwargs
+    ) -> HttpResponse:
+        response = super().finalize_response(request, response, *args, **kwargs)
+
+        if not isinstance(response, Response) or not self.should_stream(response):
+            return response
+
+        content = response.accepted_renderer.stream(
+            response.data, settings.STREAMING_CHUNK_SIZE
+        )
+        streaming_response = StreamingHttpResponse(
+            aiterate(content) if self.view_is_async else content,
+            status=response.status_code,
+            content_type=response.accepted_media_type,
+        )
+
+        for header, value in response.items():
+            if header != "Content-Type":
+                streaming_response[header] = value
+
+        return streaming_response
+
+
+class InstrumentedViewMixin:
+    """
+    Reports the time the handler spends outside the database as serialization.
+
+    Used with `InstrumentationMiddleware`; for read views that time is mostly
+    spent turning rows into response data.
+    """
+
+    def initial(self, request: HttpRequest, *args, **kwargs) -> None:
+        super().initial(request, *args, **kwargs)
+        timings = getattr(request, "timings", None)
+
+        if timings is not None:
+            self._handler_started = (time.perf_counter(), timings.db)
+
+    def finalize_response(
+        self, request: HttpRequest, response: HttpResponse, *args, **kwargs
+    ) -> HttpResponse:
+        started = getattr(self, "_handler_started", None)
+
+        if started is not None:
+            timings = request.timings
+            timings.serialize += time.perf_counter() - started[0] - (timings.db - started[1])
+
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class AsyncAPIViewMixin:
+    """
+    Dispatches DRF views and viewsets asynchronously, for ASGI servers.
+
+    Authentication, permission checks and JSON rendering run in the event
+    loop. Authenticators providing `aauthenticate` are awaited, others run in
+    a worker thread. Coroutine handlers are awaited, synchronous ones, e.g.
+    writes that need a transaction, run in a worker thread as a whole, and so
+    do blocking streamed bodies. Rendered responses are returned as plain
+    `HttpResponse` objects, so Django does not render them in a thread.
+    """
+
+    view_is_async = True
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+
+        # Coroutine handlers keep the documentation and schema annotations
+        # of the synchronous handlers they replace.
+        for name, method in vars(cls).items():
+            overridden = getattr(super(cls, cls), name, None)
+
+            if iscoroutinefunction(method) and overridden is not None:
+                method.__doc__ = method.__doc__ or overridden.__doc__
+
+                if hasattr(overridden, "kwargs"):
+                    method.kwargs = overridden.kwargs
+
+    @classmethod
+    def as_view(cls, *args, **initkwargs):
+        # Viewsets build their view functions themselves, without marking them.
+        return markcoroutinefunction(super().as_view(*args, **initkwargs))
+
+    async def dispatch(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await self.aperform_authentication(request)
+            self.initial(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(
+                    self, request.method.lower(), self.http_method_not_allowed
+                )
+            else:
+                handler = self.http_method_not_allowed
+
+            if iscoroutinefunction(handler):
+                response = await handler(request, *args, **kwargs)
+            else:
+                response = await sync_to_async(handler)(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return await self.arender(self.response)
+
+    async def aperform_authentication(self, request: Request) -> None:
+        """Authenticates the request like `Request.user`, awaiting authenticators."""
+        for authenticator in request.authenticators:
+            try:
+                if hasattr(authenticator, "aauthenticate"):
+                    user_auth_tuple = await authenticator.aauthenticate(request)
+                else:
+                    user_auth_tuple = await sync_to_async(authenticator.authenticate)(
+                        request
+                    )
+            except exceptions.APIException:
+                request._not_authenticated()
+                raise
+
+            if user_auth_tuple is not None:
+                request._authenticator = authenticator
+                request.user, request.auth = user_auth_tuple
+                return
+
+        request._not_authenticated()
+
+    async def arender(self, response: HttpResponse) -> HttpResponse:
+        """Renders JSON in the event loop and other formats in a worker thread."""
+        if isinstance(response, StreamingHttpResponse) and not response.is_async:
+            response.streaming_content = iterate_in_thread(response.streaming_content)
+
+        if not isinstance(response, Response):
+            return response
+
+        timings = getattr(self.request, "timings", None)
+        started, db = time.perf_counter(), timings.db if timings else 0.0
+
+        if isinstance(response.accepted_renderer, JSONRenderer):
+            response.render()
+        else:
+            # The browsable API renders forms, which may query the database.
+            await sync_to_async(response.render)()
+
+        if timings is not None:
+            timings.serialize += time.perf_counter() - started - (timings.db - db)
+
+        return HttpResponse(
+            response.content, status=response.status_code, headers=response.headers
+        )
+
+    async def aget_object(self) -> Model:
+        """Asynchronous version of `get_object`."""
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+
+        try:
+            obj = await aget_object_or_404(
+                queryset, **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            )
+        except (TypeError, ValueError, ValidationError):
+            raise Http404
+
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+    async def apaginate_queryset(self, queryset: QuerySet) -> list | None:
+        """
+        Asynchronous version of `paginate_queryset`.
+
+        Page number pages are loaded with the async ORM, reusing the count of
+        the `list_state` if there is one; other paginators run in a worker
+        thread.
+        """
+        paginator = self.paginator
+
+        if paginator is None:
+            return None
+
+        if not isinstance(paginator, PageNumberPagination):
+            return await sync_to_async(self.paginate_queryset)(queryset)
+
+        page_size = paginator.get_page_size(self.request)
+
+        if not page_size:
+            return None
+
+        django_paginator = paginator.django_paginator_class(queryset, page_size)
+        state = getattr(self, "list_state", None)
+        django_paginator.count = await queryset.acount() if state is None else state["count"]
+        page_number = paginator.get_page_number(self.request, django_paginator)
+
+        if page_number in paginator.last_page_strings:
+            page_number = django_paginator.num_pages
+
+        try:
+            number = django_paginator.validate_number(page_number)
+        except InvalidPage as exc:
+            raise exceptions.NotFound(
+                paginator.invalid_page_message.format(
+                    page_number=page_number, message=str(exc)
+                )
+            )
+
+        bottom = (number - 1) * page_size
+        top = bottom + page_size
+
+        if top + django_paginator.orphans >= django_paginator.count:
+            top = django_paginator.count
+
+        objects = [obj async for obj in queryset[bottom:top]]
+        paginator.page = Page(objects, number, django_paginator)
+        paginator.request = self.request
+
+        if paginator.template is not None and django_paginator.num_pages > 1:
+            paginator.display_page_controls = True
+
+        return objects
@@ -1,18 +1,167 @@
-from drf_spectacular.utils import extend_schema_view, extend_schema
-from rest_framework import viewsets
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema_view, extend_schema, OpenApiParameter
+from django.http import HttpRequest, HttpResponse, StreamingHttpResponse
+from rest_framework import permissions, viewsets
+from rest_framework.decorators import action
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
 
-from api.serializers.product import ProductReadSerializer
+from api.filters import ProductFilterBackend, StableOrderingFilter
+from api.pagination import KeysetPagination
+from api.payloads import aget_payloads, get_payloads, with_payloads
+from api.renderers import RawJSON
+from api.serializers.product import (
+    CatalogExportSerializer,
+    ProductReadSerializer,
+    ProductSearchSerializer,
+)
+from api.views.mixins import (
+    AsyncAPIViewMixin,
+    ConditionalListMixin,
+    InstrumentedViewMixin,
+    StoredPayloadMixin,
+    StreamingListMixin,
+)
+from products import exports
 from products.models import Product
+from products.search import search_product_ids
 
 
 @extend_schema_view(
     list=extend_schema(
         summary="Get product list",
-        description="Returns a list of all products with their subcategories and categories.",
+        description=(
+            "Returns a list of all products with their subcategories and categories. "
+            "Pass `pagination=cursor` to use keyset pagination, which skips the "
+            "total count and keeps deep pages as fast as the first one."
+        ),
+        parameters=[
+            OpenApiParameter("pagination", enum=("page", "cursor")),
+            OpenApiParameter("cursor", str),
+            OpenApiParameter("page_size", int),
+        ],
+    ),
+    retrieve=extend_schema(
+        summary="Get product",
+        description="Returns a product by its slug.",
+    ),
+    search=extend_schema(
+        summary="Search products",
+        description=(
+            "Returns products whose names contain words starting with every word "
+            "of the query, most relevant first."
+        ),
+        parameters=[ProductSearchSerializer],
+        responses=ProductReadSerializer(many=True),
+    ),
+    export=extend_schema(
+        summary="Export the catalog",
+        description=(
+            "Streams all products, or those changed since a given time, as JSON "
+            "lines or CSV with category and subcategory slugs and image paths."
+        ),
+        parameters=[CatalogExportSerializer],
+        responses={200: OpenApiTypes.BINARY},
     ),
 )
-class ProductViewSet(viewsets.mixins.ListModelMixin, viewsets.GenericViewSet):
-    """API endpoint that allows products to be viewed."""
+class ProductViewSet(
+    InstrumentedViewMixin,
+    StreamingListMixin,
+    ConditionalListMixin,
+    StoredPayloadMixin,
+    viewsets.mixins.ListModelMixin,
+    viewsets.mixins.RetrieveModelMixin,
+    viewsets.GenericViewSet,
+):
+    """
+    API endpoint that allows products to be viewed.
+
+    Products are served from their stored payloads instead of being serialized
+    on every request; `ProductReadSerializer` describes and builds them. Stale
+    payloads are rebuilt with their subcategories and categories, so the rows
+    themselves are loaded without joins, with the payload and ordering columns.
+    """
 
-    queryset = Product.objects.all().select_related("subcategory__category")
+    ordering_fields = ("id", "price", "name")
+    queryset = with_payloads(Product.objects.order_by("id"), *ordering_fields)
     serializer_class = ProductReadSerializer
+    lookup_field = "slug"
+    filter_backends = (ProductFilterBackend, StableOrderingFilter)
+
+    @property
+    def paginator(self) -> BasePagination | None:
+        """Switches to keyset pagination when a cursor page is requested."""
+        if not hasattr(self, "_paginator"):
+            params = self.request.query_params
+
+            if "cursor" in params or params.get("pagination") == "cursor":
+                self._paginator = KeysetPagination()
+            else:
+                self._paginator = super().paginator
+
+        return self._paginator
+
+    def get_payloads(self, products) -> list[RawJSON]:
+        """Returns the stored payloads of the products, rebuilding stale ones."""
+        return get_payloads(products)
+
+    async def aget_payloads(self, products) -> list[RawJSON]:
+        return await aget_payloads(products)
+
+    @action(detail=False, pagination_class=None, filter_backends=())
+    def search(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        """Looks products up in the full-text index and returns them by rank."""
+        params = ProductSearchSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+
+        product_ids = search_product_ids(
+            params.validated_data["q"],
+            params.validated_data["limit"],
+        )
+        products = self.get_queryset().in_bulk(product_ids)
+        return Response(
+            self.get_payloads(products[pk] for pk in product_ids if pk in products)
+        )
+
+    @action(
+        detail=False,
+        pagination_class=None,
+        filter_backends=(),
+        permission_classes=(permissions.IsAuthenticated,),
+    )
+    def export(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        """Streams the catalog export as a file download."""
+        params = CatalogExportSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+
+        export_format = params.validated_data["export_format"]
+        compress = params.validated_data["gzip"]
+        filename = f"catalog.{export_format}" + (".gz" if compress else "")
+
+        response = StreamingHttpResponse(
+            exports.export_catalog(
+                export_format,
+                since=params.validated_data.get("since"),
+                compress=compress,
+            ),
+            content_type=(
+                "application/gzip" if compress else exports.CONTENT_TYPES[export_format]
+            ),
+        )
+        response.headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+
+class AsyncProductViewSet(AsyncAPIViewMixin, ProductViewSet):
+    """
+    Product endpoint for ASGI servers.
+
+    Lists and products are loaded with the async ORM; the list state count is
+    reused by page number pagination. Search and export run in a worker thread.
+    """
+
+    async def list(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        return await self.alist(request, *args, **kwargs)
+
+    async def retrieve(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        return await self.aretrieve(request, *args, **kwargs)
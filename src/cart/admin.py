@@ -20,11 +20,17 @@ class CartItemInline(admin.TabularInline):
 class CartAdmin(admin.ModelAdmin):
     """Admin interface for the Cart model."""
 
-    list_display = ("user",)
+    list_display = ("user", "items_count", "total_quantity", "total_price")
     search_fields = ("user__username",)
+    readonly_fields = ("items_count", "total_quantity", "total_price")
     inlines = (CartItemInline,)
 
     def get_queryset(self, request: HttpRequest) -> QuerySet:
         """Overrides the default queryset to optimize queries."""
         queryset = super().get_queryset(request)
         return queryset.select_related("user").prefetch_related("cart_items__product")
+
+    def save_related(self, request: HttpRequest, form, formsets, change) -> None:
+        """Recalculates the cart totals after its items are edited inline."""
+        super().save_related(request, form, formsets, change)
+        Cart.objects.filter(pk=form.instance.pk).recalculate_totals()
@@ -1,3 +1,8 @@
 """Constants for the cart app."""
 
 DEFAULT_QUANTITY = 1
+
+
+class Price:
+    MAX_DIGITS: int = 14
+    DECIMAL_PLACES: int = 2
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F, Q
+
+from cart.models import Cart
+
+
+class Command(BaseCommand):
+    help = (
+        "Finds carts whose materialized totals differ from their items, e.g. after "
+        "bulk product updates, and optionally repairs them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--repair",
+            action="store_true",
+            help="Recalculate the totals of drifted carts.",
+        )
+
+    def handle(self, *args, **options):
+        drifted = Cart.objects.with_actual_totals().filter(
+            ~Q(total_quantity=F("actual_total_quantity"))
+            | ~Q(total_price=F("actual_total_price"))
+            | ~Q(items_count=F("actual_items_count"))
+        )
+        drifted_ids = list(drifted.values_list("pk", flat=True))
+
+        self.stdout.write(f"{len(drifted_ids)} carts have drifted totals.")
+
+        if options["repair"] and drifted_ids:
+            Cart.objects.filter(pk__in=drifted_ids).recalculate_totals()
+            self.stdout.write(self.style.SUCCESS(f"Repaired {len(drifted_ids)} carts."))
@@ -0,0 +1,54 @@
+# Generated by Django 5.1.3 on 2026-10-18 20:27
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, DecimalField, F, Sum
+
+
+def calculate_totals(apps, schema_editor):
+    Cart = apps.get_model("cart", "Cart")
+    CartItem = apps.get_model("cart", "CartItem")
+    totals = (
+        CartItem.objects.values("cart")
+        .order_by()
+        .annotate(
+            total_quantity=Sum("quantity"),
+            total_price=Sum(
+                F("quantity") * F("product__price"), output_field=DecimalField()
+            ),
+            items_count=Count("pk"),
+        )
+    )
+
+    for total in totals:
+        Cart.objects.filter(pk=total["cart"]).update(
+            total_quantity=total["total_quantity"],
+            total_price=total["total_price"],
+            items_count=total["items_count"],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cart', '0002_alter_cartitem_quantity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cart',
+            name='items_count',
+            field=models.PositiveIntegerField(default=0, help_text='Number of distinct items in the cart.'),
+        ),
+        migrations.AddField(
+            model_name='cart',
+            name='total_price',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Total price of all items in the cart.', max_digits=14),
+        ),
+        migrations.AddField(
+            model_name='cart',
+            name='total_quantity',
+            field=models.PositiveIntegerField(default=0, help_text='Total quantity of all items in the cart.'),
+        ),
+        migrations.RunPython(calculate_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.1.3 on 2026-10-18 20:29
+
+from django.db import migrations
+from django.db.models import Count, Min, Sum
+
+
+def merge_duplicate_items(apps, schema_editor):
+    """Keeps the oldest item of every cart product, summing up duplicate quantities."""
+    CartItem = apps.get_model("cart", "CartItem")
+    Cart = apps.get_model("cart", "Cart")
+    duplicates = list(
+        CartItem.objects.values("cart", "product")
+        .order_by()
+        .annotate(count=Count("pk"), first_id=Min("pk"), total_quantity=Sum("quantity"))
+        .filter(count__gt=1)
+    )
+
+    for duplicate in duplicates:
+        CartItem.objects.filter(pk=duplicate["first_id"]).update(
+            quantity=duplicate["total_quantity"]
+        )
+        CartItem.objects.filter(
+            cart=duplicate["cart"], product=duplicate["product"]
+        ).exclude(pk=duplicate["first_id"]).delete()
+        Cart.objects.filter(pk=duplicate["cart"]).update(
+            items_count=CartItem.objects.filter(cart=duplicate["cart"]).count()
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cart', '0003_cart_totals'),
+        ('products', '0007_product_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_items, migrations.RunPython.noop),
+    ]
@@ -1,12 +1,91 @@
-from django.db import models
+from decimal import Decimal
+
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
 from django.contrib.auth import get_user_model
 
-from cart.constants import DEFAULT_QUANTITY
+from cart.constants import DEFAULT_QUANTITY, Price
 from products.models import Product
 
 User = get_user_model()
 
 
+class CartQuerySet(models.QuerySet):
+    def with_actual_totals(self) -> models.QuerySet:
+        """Annotates carts with `actual_<total>` values calculated from their items."""
+        return self.annotate(
+            **{f"actual_{name}": total for name, total in self._actual_totals().items()}
+        )
+
+    def shift_totals(self, quantity: int, price: Decimal, items: int = 0) -> int:
+        """Atomically shifts the materialized totals of the carts."""
+        return self.update(
+            total_quantity=F("total_quantity") + quantity,
+            total_price=F("total_price") + price,
+            items_count=F("items_count") + items,
+        )
+
+    def reset_totals(self) -> int:
+        """Zeroes the materialized totals of emptied carts."""
+        return self.update(total_quantity=0, total_price=Decimal("0.00"), items_count=0)
+
+    def recalculate_totals(self) -> int:
+        """Overwrites the materialized totals with the ones calculated from items."""
+        return self.update(**self._actual_totals())
+
+    @staticmethod
+    def _actual_totals() -> dict:
+        items = CartItem.objects.filter(cart=OuterRef("pk")).order_by().values("cart")
+
+        def total(expression, default):
+            return Coalesce(
+                Subquery(items.annotate(total=expression).values("total")),
+                Value(default),
+            )
+
+        return {
+            "total_quantity": total(Sum("quantity"), 0),
+            "total_price": total(
+                Sum(
+                    F("quantity") * F("product__price"),
+                    output_field=models.DecimalField(),
+                ),
+                Decimal("0.00"),
+            ),
+            "items_count": total(Count("pk"), 0),
+        }
+
+
+class CartItemQuerySet(models.QuerySet):
+    def add_quantity(self, cart_id: int, product: Product, quantity: int) -> bool:
+        """
+        Adds quantity of the product to the cart, creating the item if needed.
+
+        The increment is done by the database, so concurrent additions are never
+        lost, and the unique cart product constraint resolves concurrent
+        creation. Returns whether the item was created.
+
+        Only a conflict with a concurrently created item is resolved, other
+        integrity errors, e.g. of a deleted cart, are raised.
+        """
+        item = self.filter(cart_id=cart_id, product=product)
+
+        if item.update(quantity=F("quantity") + quantity):
+            return False
+
+        try:
+            with transaction.atomic():
+                self.create(cart_id=cart_id, product=product, quantity=quantity)
+        except IntegrityError:
+            if not item.update(quantity=F("quantity") + quantity):
+                raise
+
+            return False
+
+        return True
+
+
 class Cart(models.Model):
     """Represents a shopping cart associated with a user."""
 
@@ -15,6 +94,22 @@ class Cart(models.Model):
         on_delete=models.CASCADE,
         related_name="shopping_cart",
     )
+    total_quantity = models.PositiveIntegerField(
+        default=0,
+        help_text="Total quantity of all items in the cart.",
+    )
+    total_price = models.DecimalField(
+        max_digits=Price.MAX_DIGITS,
+        decimal_places=Price.DECIMAL_PLACES,
+        default=Decimal("0.00"),
+        help_text="Total price of all items in the cart.",
+    )
+    items_count = models.PositiveIntegerField(
+        default=0,
+        help_text="Number of distinct items in the cart.",
+    )
+
+    objects = CartQuerySet.as_manager()
 
     def __str__(self) -> str:
         return f"Cart of {self.user.username}"
@@ -34,5 +129,15 @@ class CartItem(models.Model):
         help_text="Quantity of the product in the cart.",
     )
 
+    objects = CartItemQuerySet.as_manager()
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=("cart", "product"),
+                name="unique_cart_product",
+            ),
+        )
+
     def __str__(self) -> str:
         return f"{self.product.name} - {self.quantity}"
@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from cart.models import Cart
+from products.models import Product
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def create_cart(instance, created: bool, raw: bool, **kwargs) -> None:
+    """Creates the cart together with the user, so requests never have to."""
+    if created and not raw:
+        Cart.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=Product)
+def reconcile_price(
+    instance: Product, created: bool, update_fields: frozenset | None, **kwargs
+) -> None:
+    """Recalculates totals of carts holding the product when its price changed."""
+    if created or (update_fields is not None and "price" not in update_fields):
+        return
+
+    if instance.price_changed:
+        Cart.objects.filter(cart_items__product=instance).recalculate_totals()
+
+    instance._loaded_price = instance.price
+
+
+@receiver(pre_delete, sender=Product)
+def remember_carts(instance: Product, **kwargs) -> None:
+    instance._cart_ids = list(
+        Cart.objects.filter(cart_items__product=instance).values_list("pk", flat=True)
+    )
+
+
+@receiver(post_delete, sender=Product)
+def reconcile_deleted_product(instance: Product, **kwargs) -> None:
+    """Recalculates totals of carts the deleted product was removed from."""
+    Cart.objects.filter(pk__in=getattr(instance, "_cart_ids", ())).recalculate_totals()
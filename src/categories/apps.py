@@ -5,3 +5,6 @@ class CategoriesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "categories"
     verbose_name = "Categories and subcategories"
+
+    def ready(self) -> None:
+        from categories import signals  # noqa: F401
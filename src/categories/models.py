@@ -15,6 +15,10 @@ class BaseCategory(models.Model):
         unique=True,
         help_text="Unique slug for the category URL",
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        help_text="Time of the last change",
+    )
 
     def __str__(self) -> str:
         return f"{self.name} (/{self.slug}/)"
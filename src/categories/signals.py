@@ -0,0 +1,12 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from categories.models import Category, SubCategory
+
+
+@receiver(post_save, sender=SubCategory)
+@receiver(post_delete, sender=SubCategory)
+def touch_category(instance: SubCategory, **kwargs) -> None:
+    """Marks the parent category as changed, since it embeds its subcategories."""
+    Category.objects.filter(pk=instance.category_id).update(updated_at=timezone.now())
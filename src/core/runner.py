@@ -0,0 +1,18 @@
+"""Test runner of the project."""
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class TestRunner(DiscoverRunner):
+    """Runs the tests with the `TEST_CACHES` instead of the configured caches."""
+
+    def setup_test_environment(self, **kwargs) -> None:
+        super().setup_test_environment(**kwargs)
+        self._caches = override_settings(CACHES=settings.TEST_CACHES)
+        self._caches.enable()
+
+    def teardown_test_environment(self, **kwargs) -> None:
+        self._caches.disable()
+        super().teardown_test_environment(**kwargs)
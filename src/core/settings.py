@@ -1,6 +1,7 @@
 """Django settings for core project."""
 
 import os
+from datetime import timedelta
 from pathlib import Path
 
 from dotenv import load_dotenv
@@ -18,6 +19,9 @@ MEDIA_URL = "/media/"
 SECRET_KEY = os.getenv("SECRET_KEY", "simple-secret-key")
 DEBUG = os.getenv("DEBUG", "True").lower() in ("true", "1")
 ALLOWED_HOSTS = os.getenv("DJANGO_ALLOWED_HOSTS", "127.0.0.1,localhost").split(",")
+# Addresses allowed to read the metrics. Behind a reverse proxy every request
+# comes from the proxy, so list none there and scrape with METRICS_TOKEN.
+INTERNAL_IPS = [ip for ip in os.getenv("INTERNAL_IPS", "").split(",") if ip]
 CORS_ALLOWED_ORIGINS = tuple()
 
 INSTALLED_APPS = [
@@ -39,6 +43,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "api.middleware.InstrumentationMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
@@ -69,11 +74,30 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "core.wsgi.application"
 
+# Seconds a connection is reused across requests, 0 closes it after each one.
+CONN_MAX_AGE = int(os.getenv("CONN_MAX_AGE", 60))
+# PostgreSQL connections are taken from a psycopg pool instead, see the README.
+DB_POOL = os.getenv("DB_POOL", "False").lower() in ("true", "1")
+
 DATABASE_ENGINES = {
     "sqlite": {
         "default": {
             "ENGINE": "django.db.backends.sqlite3",
             "NAME": BASE_DIR / "db.sqlite3",
+            "CONN_MAX_AGE": CONN_MAX_AGE,
+            "CONN_HEALTH_CHECKS": True,
+            "OPTIONS": {
+                # Concurrent cart additions read and then write in one
+                # transaction. Taking the write lock when it starts makes them
+                # wait for each other within the busy timeout, instead of
+                # failing with "database is locked" when two read locks can't
+                # be upgraded at once.
+                "transaction_mode": os.getenv("SQLITE_TRANSACTION_MODE", "IMMEDIATE"),
+            },
+            "TEST": {
+                # A file database lets concurrent test threads lock it like in production.
+                "NAME": BASE_DIR / "test_db.sqlite3",
+            },
         }
     },
     "postgres": {
@@ -84,12 +108,68 @@ DATABASE_ENGINES = {
             "PASSWORD": os.getenv("POSTGRES_PASSWORD", "password"),
             "HOST": os.getenv("DB_HOST", "db"),
             "PORT": os.getenv("DB_PORT", 5432),
+            # The pool keeps connections open itself and rejects persistent ones.
+            "CONN_MAX_AGE": 0 if DB_POOL else CONN_MAX_AGE,
+            "CONN_HEALTH_CHECKS": True,
+            "OPTIONS": {
+                "pool": DB_POOL
+                and {
+                    "min_size": int(os.getenv("DB_POOL_MIN_SIZE", 2)),
+                    "max_size": int(os.getenv("DB_POOL_MAX_SIZE", 10)),
+                    "timeout": int(os.getenv("DB_POOL_TIMEOUT", 10)),
+                },
+            },
         }
     },
 }
 
 DATABASES = DATABASE_ENGINES[os.getenv("DB_ENGINE", "sqlite")]
 
+# Pragmas set on every new SQLite connection. WAL lets readers run alongside
+# the writer, NORMAL syncs only at checkpoints, which is safe in WAL mode, and
+# writers wait up to the busy timeout (ms) for the lock instead of failing.
+SQLITE_PRAGMAS = {
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT", 5000)),
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", 128 * 1024 * 1024)),
+}
+
+# The catalog cache must be shared by all workers, so a category change seen
+# by one of them invalidates the others' pages too. The file cache is shared
+# on one host, and kept next to the database it describes; use Redis or
+# Memcached when the API runs on several.
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND", "django.core.cache.backends.filebased.FileBasedCache"
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", str(BASE_DIR / "cache")),
+        "KEY_PREFIX": os.getenv("CACHE_KEY_PREFIX", ""),
+    }
+}
+# Tests run with their own in-process caches, see `core.runner.TestRunner`, so
+# they never clear or read the caches of a server using the same settings.
+TEST_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+}
+TEST_RUNNER = "core.runner.TestRunner"
+
+CATALOG_CACHE_ALIAS = os.getenv("CATALOG_CACHE_ALIAS", "default")
+# Bounds how long a page may stay stale if an invalidation is missed.
+CATALOG_CACHE_TIMEOUT = int(os.getenv("CATALOG_CACHE_TIMEOUT", 5 * 60))
+CART_ID_CACHE_TTL = int(os.getenv("CART_ID_CACHE_TTL", 60))
+CART_ID_CACHE_SIZE = int(os.getenv("CART_ID_CACHE_SIZE", 10_000))
+AUTH_TOKEN_CACHE_TTL = int(os.getenv("AUTH_TOKEN_CACHE_TTL", 60))
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", 10_000))
+STREAMING_THRESHOLD = int(os.getenv("STREAMING_THRESHOLD", 100))
+STREAMING_CHUNK_SIZE = int(os.getenv("STREAMING_CHUNK_SIZE", 64 * 1024))
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", 10))
+# Bearer token granting access to the metrics, empty to only allow INTERNAL_IPS.
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+# Routes the catalog and cart to async views, for serving with an ASGI server.
+ASYNC_VIEWS = os.getenv("ASYNC_VIEWS", "False").lower() in ("true", "1")
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
@@ -106,17 +186,42 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 REST_FRAMEWORK = {
+    # Every view, djoser and the catalog export included, caches token lookups
+    # in process. Logout and deactivation still apply at once, since they are
+    # revoked for all processes through the shared cache.
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.TokenAuthentication",
+        "api.authentication.CachedTokenAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.AllowAny",
     ],
+    "DEFAULT_RENDERER_CLASSES": [
+        "api.renderers.JSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 10,
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
 }
 
+# Opt-in stateless authentication: access tokens are verified by signature only,
+# so any app node sharing SECRET_KEY serves them without a database lookup.
+JWT_AUTH = os.getenv("JWT_AUTH", "False").lower() in ("true", "1")
+
+if JWT_AUTH:
+    REST_FRAMEWORK["DEFAULT_AUTHENTICATION_CLASSES"].insert(
+        0, "api.authentication.StatelessJWTAuthentication"
+    )
+
+SIMPLE_JWT = {
+    "ACCESS_TOKEN_LIFETIME": timedelta(
+        minutes=int(os.getenv("JWT_ACCESS_TOKEN_MINUTES", 5))
+    ),
+    "REFRESH_TOKEN_LIFETIME": timedelta(days=int(os.getenv("JWT_REFRESH_TOKEN_DAYS", 1))),
+    "AUTH_HEADER_TYPES": ("Bearer",),
+    "UPDATE_LAST_LOGIN": False,
+}
+
 DJOSER = {
     "LOGIN_FIELD": "username",
     "USER_CREATE_PASSWORD_RETYPE": False,
@@ -150,3 +255,9 @@ USE_I18N = True
 USE_TZ = True
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+
+PRODUCT_IMAGE_WORKERS = int(os.getenv("PRODUCT_IMAGE_WORKERS", 2))
+PRODUCT_IMAGE_FORMAT = os.getenv("PRODUCT_IMAGE_FORMAT") or None
+PRODUCT_IMAGE_QUALITY = (
+    int(os.getenv("PRODUCT_IMAGE_QUALITY")) if os.getenv("PRODUCT_IMAGE_QUALITY") else None
+)
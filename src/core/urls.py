@@ -1,11 +1,27 @@
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from api.views.product import ProductViewSet
-from api.views.category import CategoryViewSet
-from api.views.cart import CartAPIView, CartItemAPIView
+from api.views.product import AsyncProductViewSet, ProductViewSet
+from api.views.category import AsyncCategoryViewSet, CategoryViewSet
+from api.views.cart import (
+    AsyncCartAPIView,
+    AsyncCartBatchAPIView,
+    AsyncCartItemAPIView,
+    CartAPIView,
+    CartBatchAPIView,
+    CartItemAPIView,
+)
+from api.views.media import serve_media
+from api.views.metrics import serve_metrics
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
 
+if settings.ASYNC_VIEWS:
+    ProductViewSet = AsyncProductViewSet
+    CategoryViewSet = AsyncCategoryViewSet
+    CartAPIView = AsyncCartAPIView
+    CartItemAPIView = AsyncCartItemAPIView
+    CartBatchAPIView = AsyncCartBatchAPIView
 
 router = DefaultRouter()
 router.register(r"products", ProductViewSet, basename="product")
@@ -17,6 +33,9 @@ urlpatterns = [
     path("api/auth/", include("djoser.urls.authtoken")),
     path("api/cart/", CartAPIView.as_view(), name="cart"),
     path("api/cart/<int:pk>/", CartItemAPIView.as_view(), name="cart-item"),
+    path("api/cart/batch/", CartBatchAPIView.as_view(), name="cart-batch"),
+    path(f"{settings.MEDIA_URL.strip('/')}/<path:path>", serve_media, name="media"),
+    path("metrics/", serve_metrics, name="metrics"),
     path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
     path(
         "api/docs/",
@@ -24,3 +43,6 @@ urlpatterns = [
         name="swagger-ui",
     ),
 ]
+
+if settings.JWT_AUTH:
+    urlpatterns.append(path("api/auth/", include("djoser.urls.jwt")))
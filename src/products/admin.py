@@ -7,6 +7,6 @@ from products.models import Product
 class ProductAdmin(admin.ModelAdmin):
     """Admin interface for the Product model."""
 
-    list_display = ("name", "slug", "subcategory", "price")
-    list_filter = ("subcategory",)
+    list_display = ("name", "slug", "subcategory", "price", "image_status")
+    list_filter = ("subcategory", "image_status")
     search_fields = ("name",)
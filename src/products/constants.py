@@ -1,11 +1,17 @@
 """Constants for the products app."""
 
+from django.db import models
+
 
 class MaxLength:
     NAME = 255
     SLUG = 100
 
 
+# Taken by list routes of the product API, e.g. /api/products/search/.
+RESERVED_SLUGS = ("search", "export")
+
+
 class ImageUploadPath:
     ORIGINAL = "products/original/"
     SMALL = "products/small/"
@@ -18,8 +24,25 @@ class Price:
     DECIMAL_PLACES: int = 2
 
 
+# Hex digits of the content hash embedded into image file names.
+CONTENT_HASH_LENGTH = 12
+
 IMAGE_SIZES = {
     "small": (100, 100),
     "medium": (300, 300),
     "large": (600, 600),
 }
+
+
+class ImageStatus(models.TextChoices):
+    PENDING = "pending", "Pending"
+    READY = "ready", "Ready"
+    FAILED = "failed", "Failed"
+
+
+class ExportFormat(models.TextChoices):
+    JSONL = "jsonl", "JSON Lines"
+    CSV = "csv", "CSV"
+
+
+EXPORT_CHUNK_SIZE = 2000
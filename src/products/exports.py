@@ -0,0 +1,116 @@
+"""
+Streaming catalog export.
+
+Products are read with their subcategory and category slugs through a
+`.values_list()` iterator, so memory use does not depend on the catalog size.
+Rows have the columns of `import_products` plus `id`, `category` and
+`updated_at`, so an export can be imported again.
+"""
+
+import csv
+import json
+import zlib
+from collections.abc import Iterable, Iterator
+from datetime import datetime
+
+from products.constants import EXPORT_CHUNK_SIZE, ExportFormat
+from products.models import Product
+
+COLUMNS = {
+    "id": "id",
+    "slug": "slug",
+    "name": "name",
+    "price": "price",
+    "category": "subcategory__category__slug",
+    "subcategory": "subcategory__slug",
+    "image": "image",
+    "updated_at": "updated_at",
+}
+CONTENT_TYPES = {
+    ExportFormat.JSONL: "application/jsonl",
+    ExportFormat.CSV: "text/csv",
+}
+# Size of the encoded chunks handed to the writer or the response.
+BUFFER_SIZE = 64 * 1024
+
+
+def iter_rows(
+    since: datetime | None = None, chunk_size: int = EXPORT_CHUNK_SIZE
+) -> Iterator[dict]:
+    """Yields products changed since the given time, or all of them, by id."""
+    products = Product.objects.order_by("id")
+
+    if since is not None:
+        products = products.filter(updated_at__gte=since)
+
+    for values in products.values_list(*COLUMNS.values()).iterator(chunk_size):
+        row = dict(zip(COLUMNS, values))
+        row["price"] = str(row["price"])
+        row["updated_at"] = row["updated_at"].isoformat()
+        yield row
+
+
+def iter_jsonl(rows: Iterable[dict]) -> Iterator[str]:
+    """Encodes rows as JSON lines."""
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + "\n"
+
+
+class Echo:
+    """File-like object returning what is written, so `csv.writer` yields lines."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def iter_csv(rows: Iterable[dict]) -> Iterator[str]:
+    """Encodes rows as CSV lines with a header."""
+    writer = csv.writer(Echo())
+    yield writer.writerow(COLUMNS)
+
+    for row in rows:
+        yield writer.writerow(row.values())
+
+
+ENCODERS = {
+    ExportFormat.JSONL: iter_jsonl,
+    ExportFormat.CSV: iter_csv,
+}
+
+
+def buffered(lines: Iterable[str], size: int = BUFFER_SIZE) -> Iterator[bytes]:
+    """Joins lines into UTF-8 chunks of about `size` bytes."""
+    chunk, length = [], 0
+
+    for line in lines:
+        chunk.append(line)
+        length += len(line)
+
+        if length >= size:
+            yield "".join(chunk).encode()
+            chunk, length = [], 0
+
+    if chunk:
+        yield "".join(chunk).encode()
+
+
+def gzipped(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Compresses chunks into a gzip stream on the fly."""
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+
+    for chunk in chunks:
+        if compressed := compressor.compress(chunk):
+            yield compressed
+
+    yield compressor.flush()
+
+
+def export_catalog(
+    export_format: str,
+    since: datetime | None = None,
+    compress: bool = False,
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+) -> Iterator[bytes]:
+    """Streams the encoded catalog, optionally gzipped."""
+    chunks = buffered(ENCODERS[export_format](iter_rows(since, chunk_size)))
+    return gzipped(chunks) if compress else chunks
@@ -0,0 +1,231 @@
+"""
+Off-request generation of product image derivatives.
+
+Originals and derivatives are stored under names containing a hash of their
+content, so a changed image always gets a new URL and every URL can be cached
+forever. Files no longer referenced by any product are deleted.
+"""
+
+import hashlib
+import io
+import logging
+import os
+import re
+from collections.abc import Iterable
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.db import close_old_connections, connection
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.deconstruct import deconstructible
+from PIL import Image
+
+from products.constants import CONTENT_HASH_LENGTH, IMAGE_SIZES, ImageStatus
+
+logger = logging.getLogger(__name__)
+
+_executor: ProcessPoolExecutor | None = None
+
+IMAGE_FIELDS = ("image",) + tuple(f"image_{size_name}" for size_name in IMAGE_SIZES)
+HASH_SUFFIX = re.compile(rf"\.[0-9a-f]{{{CONTENT_HASH_LENGTH}}}$")
+
+
+def content_hash(chunks: Iterable[bytes]) -> str:
+    """Returns the hex digest embedded into the name of a file with this content."""
+    digest = hashlib.md5(usedforsecurity=False)
+
+    for chunk in chunks:
+        digest.update(chunk)
+
+    return digest.hexdigest()[:CONTENT_HASH_LENGTH]
+
+
+def hashed_name(name: str, digest: str) -> str:
+    """Inserts the digest before the extension, replacing a previous one."""
+    root, ext = os.path.splitext(name)
+    return f"{HASH_SUFFIX.sub('', root)}.{digest}{ext}"
+
+
+def is_hashed(name: str) -> bool:
+    """Checks whether the file name contains a content hash."""
+    return bool(HASH_SUFFIX.search(os.path.splitext(name)[0]))
+
+
+@deconstructible
+class ContentHashedStorage(FileSystemStorage):
+    """
+    File system storage naming files after a hash of their content.
+
+    Saving content that is already stored returns the existing name instead of
+    writing a copy.
+    """
+
+    def save(self, name, content, max_length=None) -> str:
+        if name is None:
+            name = content.name
+
+        if not hasattr(content, "chunks"):
+            content = File(content, name)
+
+        name = hashed_name(name, content_hash(content.chunks()))
+        content.seek(0)
+
+        if self.exists(name):
+            return name
+
+        return super().save(name, content, max_length)
+
+
+def delete_unreferenced(names: Iterable[str]) -> None:
+    """Deletes the image files among the names that no product refers to."""
+    from products.models import Product
+
+    names = {name for name in names if name}
+
+    if not names:
+        return
+
+    lookup = Q()
+
+    for field in IMAGE_FIELDS:
+        lookup |= Q(**{f"{field}__in": names})
+
+    for values in Product.objects.filter(lookup).values_list(*IMAGE_FIELDS):
+        names.difference_update(values)
+
+    for name in names:
+        default_storage.delete(name)
+
+
+def _output_options(ext: str) -> tuple[str, dict]:
+    """Returns the derivative file extension and Pillow save options."""
+    options = {"format": Image.registered_extensions().get(ext.lower())}
+
+    if settings.PRODUCT_IMAGE_FORMAT:
+        options["format"] = settings.PRODUCT_IMAGE_FORMAT.upper()
+        ext = f".{settings.PRODUCT_IMAGE_FORMAT.lower()}"
+
+    if settings.PRODUCT_IMAGE_QUALITY is not None:
+        options["quality"] = settings.PRODUCT_IMAGE_QUALITY
+
+    return ext, options
+
+
+def render_derivatives(source_path: str, image_name: str) -> dict[str, str]:
+    """
+    Renders small, medium, and large versions of an image.
+
+    The original is decoded once, at the lowest resolution the decoder can
+    provide for the largest size (JPEG draft mode), and every next size is
+    downscaled in place from the previous one.
+
+    Runs without touching the database, so it can be executed in a worker
+    process. Returns the media-relative path of every rendered size, named
+    after the hash of the rendered file.
+    """
+    base_name, ext = os.path.splitext(os.path.basename(image_name))
+    base_name = HASH_SUFFIX.sub("", base_name)
+    ext, save_options = _output_options(ext)
+    sizes = sorted(IMAGE_SIZES.items(), key=lambda item: item[1], reverse=True)
+    largest = sizes[0][1]
+    paths = {}
+
+    with Image.open(source_path) as image:
+        image.draft(image.mode, (largest[0] * 2, largest[1] * 2))
+
+        if save_options.get("format") == "JPEG" and image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+
+        for size_name, size in sizes:
+            image.thumbnail(size)
+
+            buffer = io.BytesIO()
+            image.save(buffer, **save_options)
+            content = buffer.getvalue()
+
+            file_name = hashed_name(f"{base_name}_{size_name}{ext}", content_hash([content]))
+            base_path = os.path.join("products", size_name, file_name)
+            full_path = os.path.join(settings.MEDIA_ROOT, base_path)
+
+            if not os.path.exists(full_path):
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+
+                with open(full_path, "wb") as file:
+                    file.write(content)
+
+            paths[size_name] = base_path
+
+    return paths
+
+
+def store_derivatives(product_id: int, image_name: str, paths: dict[str, str]) -> None:
+    """
+    Marks the product derivatives as ready unless its image changed meanwhile,
+    deleting the derivatives they replace.
+    """
+    from products.models import Product
+
+    products = Product.objects.filter(pk=product_id, image=image_name)
+    replaced = products.values_list(*IMAGE_FIELDS[1:]).first() or ()
+    products.update(
+        image_status=ImageStatus.READY,
+        updated_at=timezone.now(),
+        **{f"image_{size_name}": path for size_name, path in paths.items()},
+    )
+    delete_unreferenced(replaced)
+
+
+def get_executor() -> ProcessPoolExecutor:
+    """Returns the process pool rendering derivatives, creating it on first use."""
+    global _executor
+
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=settings.PRODUCT_IMAGE_WORKERS)
+
+    return _executor
+
+
+def _on_rendered(product_id: int, image_name: str, future: Future) -> None:
+    from products.models import Product
+
+    close_old_connections()
+
+    try:
+        store_derivatives(product_id, image_name, future.result())
+    except Exception:
+        logger.exception("Failed to render images for product %s", product_id)
+        Product.objects.filter(pk=product_id, image=image_name).update(
+            image_status=ImageStatus.FAILED,
+            updated_at=timezone.now(),
+        )
+    finally:
+        # Outside the request cycle a persistent connection would never be closed.
+        connection.close()
+
+
+def enqueue(product_id: int, image_name: str, source_path: str) -> Future | None:
+    """
+    Schedules derivative rendering for a product in the worker pool.
+
+    A pool broken by a dead worker, e.g. one killed for running out of memory,
+    is replaced once. If that fails too, the product is left pending for
+    `process_product_images`.
+    """
+    global _executor
+
+    for _ in range(2):
+        try:
+            future = get_executor().submit(render_derivatives, source_path, image_name)
+        except BrokenProcessPool:
+            _executor = None
+        else:
+            future.add_done_callback(partial(_on_rendered, product_id, image_name))
+            return future
+
+    logger.error("Failed to schedule images for product %s, left pending", product_id)
+    return None
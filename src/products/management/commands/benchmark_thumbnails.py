@@ -0,0 +1,73 @@
+import os
+import resource
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from PIL import Image
+
+from products.constants import IMAGE_SIZES
+from products.images import render_derivatives
+
+
+def render_derivatives_legacy(source_path: str, image_name: str) -> None:
+    """The previous implementation: full decode, one copy per size."""
+    original_image = Image.open(source_path)
+    base_name, ext = os.path.splitext(os.path.basename(image_name))
+
+    for size_name, size in IMAGE_SIZES.items():
+        image = original_image.copy()
+        image.thumbnail(size)
+
+        full_path = os.path.join(
+            settings.MEDIA_ROOT, "products", size_name, f"{base_name}_{size_name}{ext}"
+        )
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        image.save(full_path)
+
+
+IMPLEMENTATIONS = {
+    "legacy": render_derivatives_legacy,
+    "current": render_derivatives,
+}
+
+
+def measure(name: str, source_path: str, repeat: int) -> tuple[float, int]:
+    """Returns the mean time in ms and the peak RSS growth in KiB of one implementation."""
+    render = IMPLEMENTATIONS[name]
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+
+    for _ in range(repeat):
+        render(source_path, os.path.basename(source_path))
+
+    elapsed = (time.perf_counter() - started) * 1000 / repeat
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline
+    return elapsed, peak
+
+
+class Command(BaseCommand):
+    help = "Compares thumbnail rendering time and peak memory per upload."
+
+    def add_arguments(self, parser):
+        parser.add_argument("image", help="Path to the source image.")
+        parser.add_argument("--repeat", type=int, default=10)
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as media_root, override_settings(
+            MEDIA_ROOT=media_root
+        ):
+            for name in IMPLEMENTATIONS:
+                # A fresh process per implementation keeps peak RSS comparable.
+                with ProcessPoolExecutor(1, mp_context=get_context("fork")) as pool:
+                    elapsed, peak = pool.submit(
+                        measure, name, options["image"], options["repeat"]
+                    ).result()
+
+                self.stdout.write(
+                    f"{name:>8}: {elapsed:8.1f} ms/upload, peak RSS +{peak / 1024:.1f} MiB"
+                )
@@ -0,0 +1,64 @@
+import os
+import time
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from products.constants import ImageUploadPath
+from products.models import Product
+
+DIRECTORIES = {
+    "image": ImageUploadPath.ORIGINAL,
+    "image_small": ImageUploadPath.SMALL,
+    "image_medium": ImageUploadPath.MEDIUM,
+    "image_large": ImageUploadPath.LARGE,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes product image files that no product refers to, e.g. left behind "
+        "by replaced images or bulk imports."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--min-age",
+            type=int,
+            default=60 * 60,
+            help="Keep files modified less than this many seconds ago.",
+        )
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        cutoff = time.time() - options["min_age"]
+        deleted = 0
+
+        for field, directory in DIRECTORIES.items():
+            root = default_storage.path(directory)
+
+            if not os.path.isdir(root):
+                continue
+
+            referenced = set(
+                Product.objects.values_list(field, flat=True).iterator(chunk_size=10_000)
+            )
+
+            for path, _, file_names in os.walk(root):
+                for file_name in file_names:
+                    full_path = os.path.join(path, file_name)
+                    name = os.path.relpath(full_path, default_storage.location).replace(
+                        os.sep, "/"
+                    )
+
+                    if name in referenced or os.path.getmtime(full_path) > cutoff:
+                        continue
+
+                    if not options["dry_run"]:
+                        default_storage.delete(name)
+
+                    self.stdout.write(name)
+                    deleted += 1
+
+        action = "Would delete" if options["dry_run"] else "Deleted"
+        self.stdout.write(self.style.SUCCESS(f"{action} {deleted} unreferenced files."))
@@ -0,0 +1,61 @@
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from products import exports
+from products.constants import EXPORT_CHUNK_SIZE, ExportFormat
+
+
+class Command(BaseCommand):
+    help = (
+        "Exports the catalog, or products changed since a given time, to a JSONL "
+        "or CSV file with constant memory use."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", type=Path)
+        parser.add_argument(
+            "--format",
+            choices=ExportFormat.values,
+            default=ExportFormat.JSONL,
+        )
+        parser.add_argument(
+            "--since",
+            help="ISO 8601 time; only products changed at or after it are exported.",
+        )
+        parser.add_argument("--gzip", action="store_true")
+        parser.add_argument("--chunk-size", type=int, default=EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        since = None
+
+        if options["since"]:
+            since = parse_datetime(options["since"])
+
+            if since is None:
+                raise CommandError(f"Invalid time {options['since']!r}.")
+
+            if timezone.is_naive(since):
+                since = timezone.make_aware(since)
+
+        started = time.perf_counter()
+        chunks = exports.export_catalog(
+            options["format"],
+            since=since,
+            compress=options["gzip"],
+            chunk_size=options["chunk_size"],
+        )
+
+        with options["path"].open("wb") as file:
+            for chunk in chunks:
+                file.write(chunk)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Exported the catalog to {options['path']} "
+                f"in {time.perf_counter() - started:.1f} s."
+            )
+        )
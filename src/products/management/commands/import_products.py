@@ -0,0 +1,191 @@
+import csv
+import json
+import time
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import islice
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from cart.models import Cart
+from categories.models import SubCategory
+from products import search
+from products.constants import IMAGE_SIZES, ImageStatus
+from products.images import render_derivatives
+from products.models import Product
+
+FIELDS = ("slug", "name", "price", "subcategory", "image")
+# Validated by the model fields; subcategories are resolved by slug instead.
+CLEANED_FIELDS = ("slug", "name", "price")
+UPDATE_FIELDS = (
+    "name",
+    "price",
+    "subcategory",
+    "image",
+    "image_status",
+    "updated_at",
+)
+DERIVATIVE_FIELDS = tuple(f"image_{size_name}" for size_name in IMAGE_SIZES) + (
+    "image_status",
+    "updated_at",
+)
+
+
+def read_rows(path: Path) -> Iterator[dict]:
+    """Streams rows from a CSV or JSONL file."""
+    with path.open(encoding="utf-8", newline="") as file:
+        if path.suffix == ".jsonl":
+            yield from (json.loads(line) for line in file if line.strip())
+        else:
+            yield from csv.DictReader(file)
+
+
+def batched(rows: Iterator, size: int) -> Iterator[tuple]:
+    """Splits a row stream into tuples of at most `size` rows."""
+    while batch := tuple(islice(rows, size)):
+        yield batch
+
+
+def clean_row(number: int, row: dict) -> dict:
+    """Validates a row with the product fields, returning the cleaned values."""
+    missing = [field for field in FIELDS if row.get(field) is None]
+
+    if missing:
+        raise CommandError(f"Row {number}: missing {', '.join(missing)}.")
+
+    cleaned = {field: row[field] for field in FIELDS}
+
+    for field in CLEANED_FIELDS:
+        try:
+            cleaned[field] = Product._meta.get_field(field).clean(str(row[field]), None)
+        except ValidationError as error:
+            raise CommandError(
+                f"Row {number}: invalid {field} {row[field]!r}: {' '.join(error.messages)}"
+            )
+
+    return cleaned
+
+
+class Command(BaseCommand):
+    help = (
+        "Imports products from a CSV or JSONL file with the columns "
+        f"{', '.join(FIELDS)}. Products are matched by slug, subcategories are "
+        "referenced by slug and images by their path inside MEDIA_ROOT."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", type=Path)
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--workers", type=int, default=settings.PRODUCT_IMAGE_WORKERS)
+        parser.add_argument(
+            "--skip-images",
+            action="store_true",
+            help="Leave derivatives pending for process_product_images.",
+        )
+
+    def handle(self, *args, **options):
+        if not options["path"].exists():
+            raise CommandError(f"File {options['path']} does not exist.")
+
+        subcategories = dict(SubCategory.objects.values_list("slug", "id"))
+        started = time.perf_counter()
+        imported = 0
+
+        with ProcessPoolExecutor(max_workers=options["workers"]) as pool:
+            numbered_rows = enumerate(read_rows(options["path"]), start=1)
+
+            for rows in batched(numbered_rows, options["batch_size"]):
+                products = self.save_batch(rows, subcategories)
+                imported += len(rows)
+
+                if not options["skip_images"]:
+                    self.render_images(pool, products)
+
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f"{imported} rows imported ({imported / elapsed:.0f} rows/sec)"
+                )
+
+        self.stdout.write(self.style.SUCCESS(f"Imported {imported} products."))
+
+    @transaction.atomic
+    def save_batch(
+        self, rows: tuple[tuple[int, dict], ...], subcategories: dict[str, int]
+    ) -> list:
+        """
+        Creates or updates one batch of numbered products, returning those with
+        new images. Of several rows with the same slug, the last one wins.
+        """
+        now = timezone.now()
+        cleaned = {}
+
+        for number, row in rows:
+            row = clean_row(number, row)
+
+            if row["subcategory"] not in subcategories:
+                raise CommandError(
+                    f"Row {number}: unknown subcategory {row['subcategory']!r}."
+                )
+
+            cleaned[row["slug"]] = row
+
+        existing = Product.objects.in_bulk(list(cleaned), field_name="slug")
+        to_create, to_update, changed_images, repriced = [], [], [], []
+
+        for row in cleaned.values():
+            product = existing.get(row["slug"]) or Product(slug=row["slug"])
+            image_changed = product.image.name != row["image"]
+
+            if product.pk and product.price != row["price"]:
+                repriced.append(product.pk)
+
+            product.name = row["name"]
+            product.price = row["price"]
+            product.subcategory_id = subcategories[row["subcategory"]]
+            product.image = row["image"]
+            product.updated_at = now
+
+            if image_changed:
+                product.image_status = ImageStatus.PENDING
+                changed_images.append(product)
+
+            (to_update if product.pk else to_create).append(product)
+
+        Product.objects.bulk_create(to_create)
+        Product.objects.bulk_update(to_update, UPDATE_FIELDS)
+        # Bulk updates skip the signal keeping cart totals in line with prices.
+        Cart.objects.filter(cart_items__product__in=repriced).recalculate_totals()
+        search.index_products(to_create + to_update)
+        return changed_images
+
+    def render_images(self, pool: ProcessPoolExecutor, products: list) -> None:
+        """Renders derivatives of a batch in the worker pool and stores them at once."""
+        futures = {}
+
+        for product in products:
+            future = pool.submit(render_derivatives, product.image.path, product.image.name)
+            futures[future] = product
+
+        for future in as_completed(futures):
+            product = futures[future]
+            product.updated_at = timezone.now()
+
+            try:
+                paths = future.result()
+            except Exception as error:
+                # Any broken image, not only unreadable files, fails just its product.
+                self.stderr.write(f"{product.slug}: {error!r}")
+                product.image_status = ImageStatus.FAILED
+                continue
+
+            for size_name, path in paths.items():
+                setattr(product, f"image_{size_name}", path)
+
+            product.image_status = ImageStatus.READY
+
+        Product.objects.bulk_update(products, DERIVATIVE_FIELDS)
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from products.constants import ImageStatus
+from products.models import Product
+
+
+class Command(BaseCommand):
+    help = "Generates image derivatives for products that are pending or failed."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--retry-failed",
+            action="store_true",
+            help="Also process products whose previous rendering failed.",
+        )
+
+    def handle(self, *args, **options):
+        statuses = [ImageStatus.PENDING]
+
+        if options["retry_failed"]:
+            statuses.append(ImageStatus.FAILED)
+
+        processed = 0
+
+        for product in Product.objects.filter(image_status__in=statuses).iterator():
+            try:
+                product.create_images()
+            except OSError as error:
+                self.stderr.write(f"{product.slug}: {error}")
+                product.image_status = ImageStatus.FAILED
+            else:
+                processed += 1
+
+            Product.objects.filter(pk=product.pk).update(
+                image_status=product.image_status,
+                image_small=product.image_small,
+                image_medium=product.image_medium,
+                image_large=product.image_large,
+                updated_at=timezone.now(),
+            )
+
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} products."))
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.3 on 2026-10-18 20:10
+
+import django.core.validators
+from django.db import migrations, models
+
+
+def mark_existing_images_ready(apps, schema_editor):
+    Product = apps.get_model("products", "Product")
+    Product.objects.exclude(image_small="").exclude(image_small__isnull=True).update(
+        image_status="ready"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0002_alter_product_image_alter_product_image_large_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='image_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('ready', 'Ready'), ('failed', 'Failed')], default='pending', help_text='Whether the image derivatives have been generated.', max_length=7),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='price',
+            field=models.DecimalField(decimal_places=2, help_text='Price of the product.', max_digits=10, validators=[django.core.validators.MinValueValidator(0)]),
+        ),
+        migrations.RunPython(mark_existing_images_ready, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.1.3 on 2026-10-18 20:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categories', '0003_category_updated_at'),
+        ('products', '0005_product_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['subcategory', 'price', 'id'], name='product_subcat_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['subcategory', 'name', 'id'], name='product_subcat_name_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.3 on 2026-10-18 20:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0007_product_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='payload',
+            field=models.TextField(blank=True, editable=False, help_text='Pre-serialized API representation of the product.'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='payload_updated_at',
+            field=models.DateTimeField(editable=False, help_text='Value of `updated_at` the payload was built for.', null=True),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.3 on 2026-10-18 20:57
+
+import products.images
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0008_product_payload'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='product',
+            name='image',
+            field=models.ImageField(help_text='Original image of the product.', storage=products.images.ContentHashedStorage(), upload_to='products/original/'),
+        ),
+    ]
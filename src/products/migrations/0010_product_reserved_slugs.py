@@ -0,0 +1,19 @@
+# Generated by Django 5.1.3 on 2026-10-18 22:02
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0009_product_image_hashed_storage'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='product',
+            name='slug',
+            field=models.SlugField(help_text='Unique slug for the product URL.', max_length=100, unique=True, validators=[django.core.validators.RegexValidator('^(search|export)$', inverse_match=True, message='This slug is reserved for another product URL.')]),
+        ),
+    ]
@@ -1,12 +1,15 @@
-import os
-
-from django.conf import settings
-from django.core.validators import MinValueValidator
+from django.core.validators import MinValueValidator, RegexValidator
 from django.db import models, transaction
-from PIL import Image
 
 from categories.models import SubCategory
-from products.constants import MaxLength, ImageUploadPath, IMAGE_SIZES, Price
+from products import images
+from products.constants import (
+    MaxLength,
+    ImageUploadPath,
+    ImageStatus,
+    Price,
+    RESERVED_SLUGS,
+)
 
 
 class Product(models.Model):
@@ -24,10 +27,18 @@ class Product(models.Model):
     slug = models.SlugField(
         unique=True,
         max_length=MaxLength.SLUG,
+        validators=[
+            RegexValidator(
+                rf"^({'|'.join(RESERVED_SLUGS)})$",
+                inverse_match=True,
+                message="This slug is reserved for another product URL.",
+            )
+        ],
         help_text="Unique slug for the product URL.",
     )
     image = models.ImageField(
         upload_to=ImageUploadPath.ORIGINAL,
+        storage=images.ContentHashedStorage(),
         help_text="Original image of the product.",
     )
     image_small = models.ImageField(
@@ -48,55 +59,94 @@ class Product(models.Model):
         blank=True,
         help_text="Large version of the product image.",
     )
+    image_status = models.CharField(
+        max_length=max(len(value) for value in ImageStatus.values),
+        choices=ImageStatus.choices,
+        default=ImageStatus.PENDING,
+        help_text="Whether the image derivatives have been generated.",
+    )
     price = models.DecimalField(
         max_digits=Price.MAX_DIGITS,
         decimal_places=Price.DECIMAL_PLACES,
         validators=[MinValueValidator(0)],
         help_text="Price of the product.",
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        help_text="Time of the last change of the product.",
+    )
+    payload = models.TextField(
+        blank=True,
+        editable=False,
+        help_text="Pre-serialized API representation of the product.",
+    )
+    payload_updated_at = models.DateTimeField(
+        null=True,
+        editable=False,
+        help_text="Value of `updated_at` the payload was built for.",
+    )
 
-    @transaction.atomic
-    def save(self, *args, **kwargs) -> None:
-        super().save(*args, **kwargs)
-        self.create_images()
-        super().save(
-            update_fields=[f"image_{size_name}" for size_name in IMAGE_SIZES.keys()]
+    class Meta:
+        indexes = (
+            models.Index(fields=("price", "id"), name="product_price_id_idx"),
+            models.Index(fields=("name", "id"), name="product_name_id_idx"),
+            models.Index(fields=("updated_at",), name="product_updated_at_idx"),
+            models.Index(
+                fields=("subcategory", "price", "id"),
+                name="product_subcat_price_idx",
+            ),
+            models.Index(
+                fields=("subcategory", "name", "id"),
+                name="product_subcat_name_idx",
+            ),
         )
 
-    def delete(self, *args, **kwargs):
-        for image in (
-            self.image,
-            self.image_small,
-            self.image_medium,
-            self.image_large,
-        ):
-            storage = image.storage
+    @classmethod
+    def from_db(cls, db, field_names, values) -> "Product":
+        instance = super().from_db(db, field_names, values)
+        # Lets saves tell whether the price changed without another query.
+        instance._loaded_price = instance.__dict__.get("price")
+        return instance
 
-            if storage.exists(image.name):
-                storage.delete(image.name)
+    @property
+    def price_changed(self) -> bool:
+        """Returns whether the price differs from the one last loaded or saved."""
+        return getattr(self, "_loaded_price", None) != self.price
 
-        super().delete(*args, **kwargs)
+    def save(self, *args, **kwargs) -> None:
+        image_changed = not self.image._committed
+        replaced = None
 
-    def __str__(self) -> str:
-        return self.name
+        if image_changed:
+            self.image_status = ImageStatus.PENDING
 
-    def create_images(self) -> None:
-        """Creates small, medium, and large versions of the product image."""
+            if self.pk:
+                replaced = (
+                    Product.objects.filter(pk=self.pk).values_list("image", flat=True).first()
+                )
 
-        original_image = Image.open(self.image.path)
+        super().save(*args, **kwargs)
 
-        for size_name, size in IMAGE_SIZES.items():
-            image = original_image.copy()
-            image.thumbnail(size)
+        if image_changed:
+            # A failing callback must not turn the committed save into an error.
+            transaction.on_commit(
+                lambda: images.enqueue(self.pk, self.image.name, self.image.path),
+                robust=True,
+            )
 
-            image_name = os.path.basename(self.image.name)
-            base_name, ext = os.path.splitext(image_name)
+        if replaced:
+            transaction.on_commit(
+                lambda: images.delete_unreferenced([replaced]), robust=True
+            )
 
-            file_name = f"{base_name}_{size_name}{ext}"
-            base_path = os.path.join("products", size_name, file_name)
-            full_path = os.path.join(settings.MEDIA_ROOT, base_path)
+    def __str__(self) -> str:
+        return self.name
+
+    def create_images(self) -> None:
+        """Synchronously creates small, medium, and large versions of the product image."""
+        paths = images.render_derivatives(self.image.path, self.image.name)
 
-            os.makedirs(os.path.dirname(full_path), exist_ok=True)
-            image.save(full_path)
+        for size_name, path in paths.items():
+            setattr(self, f"image_{size_name}", path)
 
-            setattr(self, f"image_{size_name}", base_path)
+        self.image_status = ImageStatus.READY
@@ -0,0 +1,114 @@
+"""
+Full-text product search.
+
+SQLite keeps product names in an FTS5 virtual table maintained by `Product`
+signals, PostgreSQL uses a GIN index over the `to_tsvector` of the name, which
+needs no maintenance. Every query term is matched as a prefix.
+"""
+
+import re
+from collections.abc import Iterable
+
+from django.db import connection
+
+SQLITE_TABLE = "products_product_search"
+POSTGRES_INDEX = "products_product_name_search_idx"
+POSTGRES_VECTOR = "to_tsvector('simple', name)"
+
+
+def get_terms(query: str) -> list[str]:
+    """Splits a search query into words, dropping any query syntax."""
+    return re.findall(r"\w+", query.lower())
+
+
+def create_index(schema_editor) -> None:
+    """Creates the search index on the database of the schema editor."""
+    vendor = schema_editor.connection.vendor
+
+    if vendor == "sqlite":
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {SQLITE_TABLE} USING fts5("
+            "name, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        schema_editor.execute(
+            f"INSERT INTO {SQLITE_TABLE} (rowid, name) "
+            "SELECT id, name FROM products_product"
+        )
+    elif vendor == "postgresql":
+        schema_editor.execute(
+            f"CREATE INDEX {POSTGRES_INDEX} ON products_product "
+            f"USING GIN (({POSTGRES_VECTOR}))"
+        )
+
+
+def drop_index(schema_editor) -> None:
+    """Drops the search index from the database of the schema editor."""
+    vendor = schema_editor.connection.vendor
+
+    if vendor == "sqlite":
+        schema_editor.execute(f"DROP TABLE IF EXISTS {SQLITE_TABLE}")
+    elif vendor == "postgresql":
+        schema_editor.execute(f"DROP INDEX IF EXISTS {POSTGRES_INDEX}")
+
+
+def index_products(products: Iterable) -> None:
+    """Adds or refreshes products in the search index."""
+    if connection.vendor != "sqlite":
+        return
+
+    rows = [(product.pk, product.name) for product in products]
+
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"DELETE FROM {SQLITE_TABLE} WHERE rowid = %s", [(pk,) for pk, _ in rows]
+        )
+        cursor.executemany(
+            f"INSERT INTO {SQLITE_TABLE} (rowid, name) VALUES (%s, %s)", rows
+        )
+
+
+def remove_products(product_ids: Iterable[int]) -> None:
+    """Removes products from the search index."""
+    if connection.vendor != "sqlite":
+        return
+
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"DELETE FROM {SQLITE_TABLE} WHERE rowid = %s",
+            [(pk,) for pk in product_ids],
+        )
+
+
+def rebuild_index() -> None:
+    """Recreates the search index from the products table."""
+    with connection.schema_editor() as schema_editor:
+        drop_index(schema_editor)
+        create_index(schema_editor)
+
+
+def search_product_ids(query: str, limit: int) -> list[int]:
+    """Returns ids of the best matching products, most relevant first."""
+    terms = get_terms(query)
+
+    if not terms:
+        return []
+
+    if connection.vendor == "sqlite":
+        sql = (
+            f"SELECT rowid FROM {SQLITE_TABLE} WHERE {SQLITE_TABLE} MATCH %s "
+            "ORDER BY rank LIMIT %s"
+        )
+        params = [" ".join(f'"{term}"*' for term in terms), limit]
+    elif connection.vendor == "postgresql":
+        sql = (
+            f"SELECT id FROM products_product, to_tsquery('simple', %s) query "
+            f"WHERE {POSTGRES_VECTOR} @@ query "
+            f"ORDER BY ts_rank({POSTGRES_VECTOR}, query) DESC, id LIMIT %s"
+        )
+        params = [" & ".join(f"{term}:*" for term in terms), limit]
+    else:
+        raise NotImplementedError(f"Search is not supported on {connection.vendor}.")
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
@@ -0,0 +1,45 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from categories.models import Category, SubCategory
+from products import images, search
+from products.models import Product
+
+
+@receiver(post_save, sender=Category)
+def touch_category_products(instance: Category, **kwargs) -> None:
+    """Marks products of the category as changed, since they embed its name."""
+    Product.objects.filter(subcategory__category=instance).update(
+        updated_at=timezone.now()
+    )
+
+
+@receiver(post_save, sender=SubCategory)
+def touch_subcategory_products(instance: SubCategory, **kwargs) -> None:
+    """Marks products of the subcategory as changed, since they embed its name."""
+    Product.objects.filter(subcategory=instance).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Product)
+def index_product(instance: Product, **kwargs) -> None:
+    """Keeps the product in the search index up to date."""
+    search.index_products([instance])
+
+
+@receiver(post_delete, sender=Product)
+def unindex_product(instance: Product, **kwargs) -> None:
+    """Removes the deleted product from the search index."""
+    search.remove_products([instance.pk])
+
+
+@receiver(post_delete, sender=Product)
+def delete_product_images(instance: Product, **kwargs) -> None:
+    """
+    Deletes image files of the deleted product once the deletion is committed.
+
+    Also runs for queryset and cascade deletes, unlike `Model.delete`.
+    """
+    names = [getattr(instance, field).name for field in images.IMAGE_FIELDS]
+    transaction.on_commit(lambda: images.delete_unreferenced(names))